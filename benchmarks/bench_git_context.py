@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Benchmark: pure-Python git context resolver vs. two `git rev-parse` calls.
+
+Usage:
+  python3 benchmarks/bench_git_context.py [iterations]
+
+Builds throwaway repositories under a temp dir - a plain repo with nested
+directories 0..12 levels deep, a linked worktree and a submodule-style
+``.git`` file - then times `git_context` from scripts/smart_tab_title.py
+(cold and with the HEAD-mtime and marker caches) against the previous subprocess
+implementation. When git is installed, both are checked for agreement.
+"""
+from __future__ import annotations
+
+import runpy
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+TITLE = runpy.run_path(str(ROOT / "scripts" / "smart_tab_title.py"))
+git_context = TITLE["git_context"]
+DEPTHS = (0, 3, 6, 12)
+
+
+def legacy_branch(cwd: Path) -> Optional[str]:
+    try:
+        toplevel = subprocess.check_output(["git", "rev-parse", "--show-toplevel"], cwd=cwd, text=True, stderr=subprocess.DEVNULL).strip()
+        branch = subprocess.check_output(["git", "rev-parse", "--abbrev-ref", "HEAD"], cwd=cwd, text=True, stderr=subprocess.DEVNULL).strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    return f"{Path(toplevel).name}:{branch}"
+
+
+def resolver_branch(cwd: Path) -> Optional[str]:
+    found = TITLE["find_git_root"](cwd)
+    if found is None:
+        return None
+    return f"{Path(found[0]).name}:{TITLE['read_branch'](found[1])}"
+
+
+def nested(base: Path, depth: int) -> Path:
+    path = base.joinpath(*[f"d{i}" for i in range(depth)])
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def build_layouts(tmp: Path, have_git: bool) -> dict[str, Path]:
+    layouts: dict[str, Path] = {}
+    main = tmp / "main"
+    main.mkdir()
+    if have_git:
+        def git(*args: str, cwd: Path = main) -> None:
+            subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+        git("init", "-q", "-b", "main")
+        git("-c", "user.name=bench", "-c", "user.email=bench@example.com", "commit", "-q", "--allow-empty", "-m", "init")
+        git("worktree", "add", "-q", "-b", "feature/wt", str(tmp / "wt"))
+    else:
+        (main / ".git").mkdir()
+        (main / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+        wt_gitdir = main / ".git" / "worktrees" / "wt"
+        wt_gitdir.mkdir(parents=True)
+        (wt_gitdir / "HEAD").write_text("ref: refs/heads/feature/wt\n")
+        (tmp / "wt").mkdir()
+        (tmp / "wt" / ".git").write_text(f"gitdir: {wt_gitdir}\n")
+    # Submodule layout: relative gitdir file into the superproject's modules/
+    modules = main / ".git" / "modules" / "sub"
+    modules.mkdir(parents=True)
+    (modules / "HEAD").write_text("ref: refs/heads/vendor\n")
+    sub = main / "sub"
+    sub.mkdir()
+    (sub / ".git").write_text("gitdir: ../.git/modules/sub\n")
+    for depth in DEPTHS:
+        layouts[f"repo depth {depth}"] = nested(main / "src", depth)
+        layouts[f"worktree depth {depth}"] = nested(tmp / "wt" / "src", depth)
+    layouts["submodule depth 3"] = nested(sub / "lib", 3)
+    return layouts
+
+
+def per_call_us(func: Callable[[Path], object], cwd: Path, iterations: int, before: Callable[[], None] = lambda: None) -> float:
+    total = 0.0
+    for _ in range(iterations):
+        before()
+        start = time.perf_counter()
+        func(cwd)
+        total += time.perf_counter() - start
+    return total / iterations * 1e6
+
+
+def clear_caches() -> None:
+    TITLE["_ROOT_CACHE"].clear()
+    TITLE["_HEAD_CACHE"].clear()
+    TITLE["_PROJECT_CACHE"].clear()
+
+
+def main(argv: list[str]) -> int:
+    iterations = int(argv[1]) if len(argv) > 1 else 200
+    have_git = shutil.which("git") is not None
+    with tempfile.TemporaryDirectory() as tmp_name:
+        layouts = build_layouts(Path(tmp_name), have_git)
+        print(f"{'layout':<20} {'git subprocess':>15} {'resolver cold':>14} {'cached':>9}")
+        for name, cwd in layouts.items():
+            if have_git and "submodule" not in name:
+                expected = legacy_branch(cwd)
+                got = resolver_branch(cwd)
+                if expected != got:
+                    raise SystemExit(f"{name}: git says {expected!r}, resolver says {got!r}")
+                legacy = f"{per_call_us(legacy_branch, cwd, max(1, iterations // 20)):12.0f} µs"
+            else:
+                legacy = f"{'n/a':>15}"
+            cold = per_call_us(git_context, cwd, iterations, before=clear_caches)
+            git_context(cwd)
+            cached = per_call_us(git_context, cwd, iterations)
+            print(f"{name:<20} {legacy:>15} {cold:11.1f} µs {cached:6.1f} µs")
+    if not have_git:
+        print("git not installed: skipped the subprocess comparison", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Benchmark: bytes written to the terminal per keystroke by the pickers.
+
+Usage:
+  python3 benchmarks/bench_picker_bytes.py [items]
+
+Runs two copies of a picker over the same synthetic list in a pseudo
+terminal (120x40): the previous loop, which calls ``stdscr.clear()`` and
+repaints every row on each key, and kittens/list_view.ListView, which only
+rewrites rows that changed. Both get the same keystrokes (j/k moves and
+PgDn/PgUp pages); every byte the picker writes after each key is counted.
+"""
+from __future__ import annotations
+
+import curses
+import fcntl
+import os
+import pty
+import select
+import struct
+import sys
+import termios
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "kittens"))
+
+ROWS, COLS = 40, 120
+TITLE = "Picker — Arrow keys: navigate | Enter: select | Esc/q: cancel"
+PGDN = b"\x1b[6~"
+PGUP = b"\x1b[5~"
+KEYS = [b"j"] * 30 + [PGDN] * 3 + [b"k"] * 20 + [PGUP] * 2
+QUIET = 0.05
+
+
+def make_items(count: int) -> list[str]:
+    return [f"item {i:05d}  /home/user/projects/repo-{i % 97}/src/module_{i % 13}.py" for i in range(count)]
+
+
+def legacy_ui(stdscr, items: list[str]) -> None:
+    """The loop the pickers used before list_view."""
+    curses.curs_set(0)
+    stdscr.keypad(True)
+    selected_idx = 0
+    while True:
+        stdscr.clear()
+        h, w = stdscr.getmaxyx()
+        stdscr.addnstr(0, 0, TITLE, w - 1, curses.A_BOLD)
+        visible_lines = h - 3
+        scroll_offset = max(0, selected_idx - visible_lines + 1)
+        for idx in range(scroll_offset, min(scroll_offset + visible_lines, len(items))):
+            attr = curses.A_REVERSE if idx == selected_idx else curses.A_NORMAL
+            stdscr.addnstr(2 + idx - scroll_offset, 2, items[idx], w - 3, attr)
+        stdscr.refresh()
+        ch = stdscr.getch()
+        if ch in (ord("q"), 27):
+            return
+        elif ch in (curses.KEY_UP, ord("k")):
+            selected_idx = max(0, selected_idx - 1)
+        elif ch in (curses.KEY_DOWN, ord("j")):
+            selected_idx = min(len(items) - 1, selected_idx + 1)
+        elif ch == curses.KEY_PPAGE:
+            selected_idx = max(0, selected_idx - 10)
+        elif ch == curses.KEY_NPAGE:
+            selected_idx = min(len(items) - 1, selected_idx + 10)
+
+
+def list_view_ui(stdscr, items: list[str]) -> None:
+    from list_view import BLANK, CANCEL, ListView, text_line
+
+    curses.curs_set(0)
+    view = ListView(stdscr)
+    header = (text_line(TITLE, curses.A_BOLD), BLANK)
+
+    def row(idx, selected, width):
+        return text_line(items[idx], curses.A_REVERSE if selected else curses.A_NORMAL, col=2)
+
+    while True:
+        view.render(header, len(items), row)
+        if view.handle(stdscr.getch(), len(items)) == CANCEL:
+            return
+
+
+def read_until_quiet(fd: int) -> int:
+    total = 0
+    while True:
+        ready, _, _ = select.select([fd], [], [], QUIET)
+        if not ready:
+            return total
+        try:
+            chunk = os.read(fd, 65536)
+        except OSError:
+            return total
+        if not chunk:
+            return total
+        total += len(chunk)
+
+
+def measure(mode: str, count: int) -> tuple[int, list[int]]:
+    pid, fd = pty.fork()
+    if pid == 0:
+        os.environ["TERM"] = "xterm-256color"
+        ui = legacy_ui if mode == "legacy" else list_view_ui
+        curses.wrapper(ui, make_items(count))
+        os._exit(0)
+    fcntl.ioctl(fd, termios.TIOCSWINSZ, struct.pack("HHHH", ROWS, COLS, 0, 0))
+    time.sleep(0.3)
+    first = read_until_quiet(fd)
+    per_key = []
+    for key in KEYS:
+        os.write(fd, key)
+        per_key.append(read_until_quiet(fd))
+    os.write(fd, b"q")
+    read_until_quiet(fd)
+    os.waitpid(pid, 0)
+    os.close(fd)
+    return first, per_key
+
+
+def main(argv: list[str]) -> int:
+    count = int(argv[1]) if len(argv) > 1 else 5000
+    print(f"{len(KEYS)} keystrokes over {count} items in a {COLS}x{ROWS} terminal")
+    print(f"{'renderer':<12} {'first paint':>12} {'bytes/key':>10} {'max/key':>8} {'total':>8}")
+    for mode in ("legacy", "list_view"):
+        first, per_key = measure(mode, count)
+        mean = sum(per_key) / len(per_key)
+        print(f"{mode:<12} {first:>12} {mean:>10.0f} {max(per_key):>8} {sum(per_key):>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: watcher command-name extraction vs. the shlex version.
+
+Usage:
+  python3 benchmarks/bench_short_command.py [iterations]
+
+Loads watchers/activity.py outside kitty and times `_short_command` against
+the previous shlex.split + Path implementation on short interactive
+commands, long generated command lines, and a repeated-command workload
+that exercises the LRU cache. Also checks that both give the same answers.
+"""
+from __future__ import annotations
+
+import runpy
+import shlex
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+WATCHER = runpy.run_path(str(ROOT / "watchers" / "activity.py"))
+short_command = WATCHER["_short_command"]
+command_name = WATCHER["_command_name"]
+
+
+def legacy_short_command(cmdline: str) -> str:
+    try:
+        parts = shlex.split(cmdline)
+    except ValueError:
+        parts = cmdline.split()
+    if not parts:
+        return ""
+    return Path(parts[0]).name[:32]
+
+
+INTERACTIVE = [
+    "ls -la",
+    "git status",
+    "git commit -m 'fix: handle empty payload'",
+    "/usr/bin/python3 -m pytest -q tests/",
+    "nvim src/main.rs",
+    '"./build tools/run.sh" --release',
+    "make -j8",
+    "cd ~/src/project",
+]
+LONG = [
+    "find . " + " ".join(f"-name 'file_{i}.py' -o" for i in range(300)) + " -name x",
+    "xargs -0 -n1 rm -- " + " ".join(f'"/tmp/build/obj/{i:05d}.o"' for i in range(500)),
+]
+
+
+def check_equivalence() -> None:
+    for cmdline in INTERACTIVE + LONG:
+        expected = legacy_short_command(cmdline)
+        got = short_command(cmdline)
+        if expected != got:
+            raise SystemExit(f"mismatch for {cmdline[:40]!r}: {expected!r} != {got!r}")
+
+
+def bench(label: str, func, workload: list[str], iterations: int) -> float:
+    def run() -> None:
+        for cmdline in workload:
+            func(cmdline)
+
+    best = min(timeit.repeat(run, number=iterations, repeat=5))
+    per_call = best / (iterations * len(workload)) * 1e6
+    print(f"  {label:<22} {per_call:9.2f} µs/call")
+    return per_call
+
+
+def main(argv: list[str]) -> int:
+    iterations = int(argv[1]) if len(argv) > 1 else 2000
+    check_equivalence()
+    print(f"long command line lengths: {[len(c) for c in LONG]}")
+    for name, workload, its in (
+        ("interactive (repeated)", INTERACTIVE, iterations),
+        ("long generated", LONG, max(1, iterations // 20)),
+    ):
+        print(f"{name}:")
+        old = bench("shlex.split + Path", legacy_short_command, workload, its)
+        scan = bench("leading-word scan", command_name, workload, its)
+        cached = bench("scan + LRU", short_command, workload, its)
+        print(f"  speedup: scan {old / scan:.1f}x, cached {old / cached:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
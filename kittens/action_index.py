@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""Discovered, cached action registry for the command palette.
+
+Actions come from four sources under ~/.config/kitty: ``map`` lines in
+includes/keymaps.conf, described scripts/*.sh, sessions/*.session and
+themes/*.conf. Each source is stamped with the mtimes of the files it was
+read from; opening the index re-discovers only sources whose stamp
+changed, and the result is kept in ~/.cache/kitty/action-index.json.
+
+Every action is plain data (an ID, a label, a description and kitty
+action strings or a theme name), so it can be cached, ranked and
+dispatched by ID. ActionMatcher searches a sorted token index built once per open.
+
+Standalone, lists the discovered actions:
+
+  python3 action_index.py [query]
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import shlex
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from theme_index import META_FILES
+
+HOME = Path.home()
+CFG = HOME / ".config" / "kitty"
+INDEX_FILE = HOME / ".cache" / "kitty" / "action-index.json"
+INDEX_VERSION = 1
+# Ranking bonus per log(1 + usage score); one run is worth about one prefix match
+USAGE_WEIGHT = 3.0
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_TITLE_RE = re.compile(r"""--title[= ](?:"([^"]*)"|'([^']*)'|(\S+))""")
+# kitty has no trailing comments, but a few map lines carry notes after " # "
+_NOTE_RE = re.compile(r"\s+#\s.*$")
+
+
+class ActionEntry(NamedTuple):
+    id: str
+    label: str
+    desc: str
+    # "kitty": target is a mappable kitty action; "sequence": several of them,
+    # one per line, run in order; "theme": target is a theme name
+    kind: str
+    target: str
+    keys: str = ""
+
+    @property
+    def steps(self) -> List[str]:
+        return self.target.splitlines() if self.kind == "sequence" else [self.target]
+
+
+# Stamp: (path, mtime) of every file (and directory) a source was read from
+Stamp = List[Tuple[str, float]]
+
+
+def humanize(name: str) -> str:
+    """toggle_perf_profile -> Toggle Perf Profile."""
+    return " ".join(word.capitalize() for word in re.split(r"[_\-\s]+", name) if word)
+
+
+def tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def description(path: Path) -> str:
+    """First comment line after the shebang of a script or session file."""
+    try:
+        with open(path, errors="replace") as f:
+            for i, line in enumerate(f):
+                if i > 5:
+                    break
+                if line.startswith("#!"):
+                    continue
+                if line.startswith("#"):
+                    return line.lstrip("#").strip()
+    except OSError:
+        pass
+    return ""
+
+
+def overlay(title: str, *command: str) -> str:
+    return shlex.join(["launch", "--type=overlay", f"--title={title}", *command])
+
+
+def builtin_actions() -> List[ActionEntry]:
+    """The palette's own actions, which are not bound to any key."""
+    config = os.fspath(CFG / "kitty.conf")
+    help_center = os.fspath(CFG / "kittens" / "help_center.py")
+    return [
+        ActionEntry("builtin:new-tab", "New Tab", "Open a new tab in CWD", "kitty", "new_tab_with_cwd"),
+        ActionEntry("builtin:new-window", "New Window", "Open a new window in CWD", "kitty", "new_window_with_cwd"),
+        ActionEntry("builtin:new-os-window", "New OS Window", "Open a new OS window", "kitty", "new_os_window"),
+        ActionEntry("builtin:hsplit", "Horizontal Split", "Split window horizontally", "kitty", "launch --location=hsplit --cwd=current"),
+        ActionEntry("builtin:vsplit", "Vertical Split", "Split window vertically", "kitty", "launch --location=vsplit --cwd=current"),
+        ActionEntry("builtin:fullscreen", "Toggle Fullscreen", "Fullscreen the current window", "kitty", "toggle_fullscreen"),
+        ActionEntry("builtin:maximized", "Toggle Maximized", "Maximize the current window", "kitty", "toggle_maximized"),
+        ActionEntry("builtin:clear", "Clear Terminal", "Reset the active terminal", "kitty", "clear_terminal reset active"),
+        ActionEntry("builtin:edit-config", "Edit Config", "Open kitty.conf in $EDITOR", "kitty",
+                    overlay("Edit Config", "sh", "-lc", f"${{EDITOR:-nvim}} {shlex.quote(config)}")),
+        ActionEntry("builtin:reload-config", "Reload Config", "Reload configuration", "kitty", "load_config_file"),
+        ActionEntry("builtin:debug-config", "Debug Config", "Open debug view", "kitty", "debug_config"),
+        ActionEntry("builtin:help", "Help Center", "Searchable help", "kitty", overlay("Help", "python3", help_center)),
+        # Multi-step actions, dispatched in one go by the kitten
+        ActionEntry("builtin:side-shell", "Side Shell Here", "Splits layout, shell on the right in CWD titled 'side'", "sequence",
+                    "goto_layout splits\nlaunch --location=vsplit --cwd=current --title=side"),
+        ActionEntry("builtin:scratch-tab", "Scratch Tab", "New tab in CWD named 'scratch' with a stacked split", "sequence",
+                    "new_tab_with_cwd\nset_tab_title scratch\ngoto_layout splits\nlaunch --location=hsplit --cwd=current"),
+    ]
+
+
+def parse_map_line(line: str) -> Optional[Tuple[str, str]]:
+    """``map <keys> <action>`` -> (keys, action); None for anything else."""
+    parts = line.split(None, 2)
+    if len(parts) < 3 or parts[0] != "map" or parts[1].startswith("-"):
+        return None
+    action = _NOTE_RE.sub("", parts[2]).strip()
+    return (parts[1], action) if action else None
+
+
+def map_label(action: str) -> str:
+    """Launch actions are named by their --title, others by the action name."""
+    name, _, args = action.partition(" ")
+    if name == "launch":
+        m = _TITLE_RE.search(action)
+        if m:
+            return next(group for group in m.groups() if group is not None)
+    if name == "kitten":
+        name, _, args = args.partition(" ")
+    return f"{humanize(name)} {args}".strip()
+
+
+def discover_keymaps(path: Path) -> List[ActionEntry]:
+    try:
+        lines = path.read_text(errors="replace").splitlines()
+    except OSError:
+        return []
+    keys_for: Dict[str, List[str]] = {}
+    for line in lines:
+        parsed = parse_map_line(line.strip())
+        if parsed is None:
+            continue
+        keys, action = parsed
+        # The palette does not list itself
+        if "command_palette" in action:
+            continue
+        keys_for.setdefault(action, []).append(keys)
+    return [
+        ActionEntry(f"map:{action}", map_label(action), action, "kitty", action, ", ".join(keys))
+        for action, keys in keys_for.items()
+    ]
+
+
+def discover_scripts(directory: Path) -> List[ActionEntry]:
+    actions = []
+    for path in sorted(directory.glob("*.sh")):
+        desc = description(path)
+        # Undescribed scripts are helpers that need arguments
+        if not desc:
+            continue
+        label = humanize(path.stem)
+        actions.append(ActionEntry(
+            f"script:{path.stem}", label, desc, "kitty", overlay(label, "bash", "-lc", shlex.quote(os.fspath(path)))
+        ))
+    return actions
+
+
+def discover_sessions(directory: Path) -> List[ActionEntry]:
+    actions = []
+    for path in sorted(directory.glob("*.session")):
+        label = f"Session: {path.stem}"
+        target = shlex.join(["launch", "--type=os-window", f"--title={label}", "kitty", "--session", os.fspath(path)])
+        actions.append(ActionEntry(
+            f"session:{path.stem}", label, description(path) or f"Open {path.name} in a new OS window", "kitty", target
+        ))
+    return actions
+
+
+def discover_themes(directory: Path) -> List[ActionEntry]:
+    return [
+        ActionEntry(f"theme:{path.stem}", f"Theme: {path.stem}", "Apply theme and reload config", "theme", path.stem)
+        for path in sorted(directory.glob("*.conf"))
+        if path.name not in META_FILES
+    ]
+
+
+def stamp(path: Path, pattern: Optional[str] = None) -> Stamp:
+    """mtimes of *path* and, for a directory, of its files matching *pattern*."""
+    try:
+        result = [(os.fspath(path), path.stat().st_mtime)]
+    except OSError:
+        return []
+    if pattern is not None:
+        for entry in sorted(path.glob(pattern)):
+            try:
+                result.append((os.fspath(entry), entry.stat().st_mtime))
+            except OSError:
+                continue
+    return result
+
+
+class Source(NamedTuple):
+    name: str
+    stamp: Callable[[], Stamp]
+    discover: Callable[[], List[ActionEntry]]
+
+
+def sources(config_dir: Path = CFG) -> List[Source]:
+    keymaps = config_dir / "includes" / "keymaps.conf"
+    scripts = config_dir / "scripts"
+    sessions = config_dir / "sessions"
+    themes = config_dir / "themes"
+    return [
+        Source("keymaps", lambda: stamp(keymaps), lambda: discover_keymaps(keymaps)),
+        Source("scripts", lambda: stamp(scripts, "*.sh"), lambda: discover_scripts(scripts)),
+        Source("sessions", lambda: stamp(sessions, "*.session"), lambda: discover_sessions(sessions)),
+        # Theme names only come from file names, so the directory mtime is enough
+        Source("themes", lambda: stamp(themes), lambda: discover_themes(themes)),
+    ]
+
+
+def read_index(cache: Path = INDEX_FILE) -> Dict[str, dict]:
+    try:
+        data = json.loads(cache.read_text())
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return {}
+    return data.get("sources", {})
+
+
+def write_index(cached: Dict[str, dict], cache: Path = INDEX_FILE) -> None:
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache.with_name(f".{cache.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"version": INDEX_VERSION, "sources": cached}))
+    os.replace(tmp, cache)
+
+
+def load_actions(config_dir: Path = CFG, cache: Path = INDEX_FILE) -> List[ActionEntry]:
+    """Built-in plus discovered actions; only sources whose files changed are re-read."""
+    cached = read_index(cache)
+    changed = False
+    actions = builtin_actions()
+    for source in sources(config_dir):
+        current = [list(item) for item in source.stamp()]
+        entry = cached.get(source.name)
+        if entry is None or entry.get("stamp") != current:
+            entry = cached[source.name] = {"stamp": current, "actions": [list(a) for a in source.discover()]}
+            changed = True
+        actions.extend(ActionEntry(*item) for item in entry["actions"])
+    # A script or built-in action that already has a key binding is listed
+    # once, under its map line
+    bound = {action.target for action in actions if action.kind == "kitty" and action.keys}
+    mapped = " ".join(bound)
+    actions = [
+        action for action in actions
+        if not (action.kind == "kitty" and not action.keys and action.target in bound)
+        and not (action.id.startswith("script:") and f"/{action.id[len('script:'):]}.sh" in mapped)
+    ]
+    if changed:
+        try:
+            write_index(cached, cache)
+        except OSError:
+            pass
+    return actions
+
+
+def find_action(action_id: str, config_dir: Path = CFG, cache: Path = INDEX_FILE) -> Optional[ActionEntry]:
+    for action in load_actions(config_dir, cache):
+        if action.id == action_id:
+            return action
+    return None
+
+
+class ActionMatcher:
+    """Token-prefix search over a list of actions.
+
+    Label and description tokens are collected once into a sorted
+    vocabulary with a posting set per token; a query word is a bisect to
+    the run of tokens it prefixes plus a union of their postings, and a
+    query is the intersection over its words, never a scan of the actions.
+    Word lookups and whole results are cached. Usage scores from
+    action_usage are added to the lexical score, so frequent actions rise.
+    """
+
+    def __init__(self, actions: List[ActionEntry], usage: Optional[Dict[str, float]] = None) -> None:
+        self.actions = actions
+        # Frecency bonus per action: recently and often run actions rank first
+        usage = usage or {}
+        self.boost = [USAGE_WEIGHT * math.log1p(usage.get(action.id, 0.0)) for action in actions]
+        self.postings: Dict[str, set] = {}
+        self.label_postings: Dict[str, set] = {}
+        for idx, action in enumerate(actions):
+            label = tokens(action.label)
+            for token in label:
+                self.label_postings.setdefault(token, set()).add(idx)
+            for token in label + tokens(f"{action.desc} {action.keys}"):
+                self.postings.setdefault(token, set()).add(idx)
+        self.vocabulary = sorted(self.postings)
+        self.default_order = sorted(range(len(actions)), key=lambda i: (-self.boost[i], actions[i].label.lower()))
+        self._words: Dict[str, Tuple[frozenset, frozenset]] = {}
+        self._results: Dict[str, List[int]] = {"": self.default_order}
+
+    def lookup(self, word: str) -> Tuple[frozenset, frozenset]:
+        """(actions with a token starting with *word*, those where it is a label token)."""
+        cached = self._words.get(word)
+        if cached is not None:
+            return cached
+        found: set = set()
+        in_label: set = set()
+        vocabulary = self.vocabulary
+        pos = bisect_left(vocabulary, word)
+        while pos < len(vocabulary) and vocabulary[pos].startswith(word):
+            token = vocabulary[pos]
+            found |= self.postings[token]
+            in_label |= self.label_postings.get(token, set())
+            pos += 1
+        result = self._words[word] = (frozenset(found), frozenset(in_label))
+        return result
+
+    def rank(self, query: str) -> List[int]:
+        """Indexes of matching actions, best first."""
+        words = tokens(query)
+        key = " ".join(words)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+        hits = [self.lookup(word) for word in words]
+        candidates = frozenset.intersection(*(found for found, _ in hits))
+        scored = []
+        for idx in candidates:
+            # Every word matched somewhere; words that start a label word count more
+            score = sum(5 if idx in in_label else 2 for _, in_label in hits) + self.boost[idx]
+            scored.append((-score, self.actions[idx].label.lower(), idx))
+        scored.sort()
+        result = self._results[key] = [idx for _, _, idx in scored]
+        return result
+
+    def filter(self, query: str) -> List[ActionEntry]:
+        return [self.actions[idx] for idx in self.rank(query)]
+
+
+if __name__ == "__main__":
+    import sys
+
+    from action_usage import UsageStore
+
+    actions = load_actions()
+    matcher = ActionMatcher(actions, UsageStore().scores_for(action.id for action in actions))
+    for action in matcher.filter(" ".join(sys.argv[1:])):
+        print(f"{action.id[:40]:<40} {action.label[:32]:<32} {action.keys}")
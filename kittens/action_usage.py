@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Fixed-size frecency store for command palette actions.
+
+One file of SLOTS fixed records (action ID digest, score, timestamp) under
+~/.cache/kitty. A score halves every HALF_LIFE seconds and each run adds
+one, so recent and frequent actions rank first and old habits fade
+without any cleanup pass. Reading is one mmap of a few kilobytes;
+recording updates a single record in place under a file lock, replacing
+the weakest record once the table is full.
+"""
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import mmap
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+USAGE_FILE = Path.home() / ".cache" / "kitty" / "palette-usage.bin"
+SLOTS = 256
+HALF_LIFE = 7 * 24 * 3600.0
+
+_MAGIC = b"KPU1"
+# magic, slot count
+_HEADER = struct.Struct("<4sI")
+# action ID digest, score at timestamp, timestamp
+_SLOT = struct.Struct("<8sdd")
+_EMPTY = bytes(8)
+
+
+def action_key(action_id: str) -> bytes:
+    return hashlib.blake2b(action_id.encode("utf-8"), digest_size=8).digest()
+
+
+def decayed(score: float, stamp: float, now: float) -> float:
+    return score * 0.5 ** (max(0.0, now - stamp) / HALF_LIFE)
+
+
+class UsageStore:
+    """Decaying run counts keyed by action ID."""
+
+    def __init__(self, path: Path = USAGE_FILE, slots: int = SLOTS) -> None:
+        self.path = path
+        self.slots = slots
+
+    def _valid(self, data) -> bool:
+        return len(data) == _HEADER.size + self.slots * _SLOT.size and _HEADER.unpack_from(data, 0) == (_MAGIC, self.slots)
+
+    def scores(self, now: Optional[float] = None) -> Dict[bytes, float]:
+        """Current score of every recorded action, keyed by ``action_key``."""
+        now = time.time() if now is None else now
+        try:
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if not self._valid(mm):
+                    return {}
+                return {
+                    key: decayed(score, stamp, now)
+                    for key, score, stamp in _SLOT.iter_unpack(mm[_HEADER.size:])
+                    if key != _EMPTY
+                }
+        except (OSError, ValueError):
+            return {}
+
+    def scores_for(self, action_ids: Iterable[str]) -> Dict[str, float]:
+        """Current scores of the recorded actions among *action_ids*."""
+        scores = self.scores()
+        if not scores:
+            return {}
+        result = {}
+        for action_id in action_ids:
+            score = scores.get(action_key(action_id))
+            if score:
+                result[action_id] = score
+        return result
+
+    def record(self, action_id: str, now: Optional[float] = None) -> None:
+        """Add one run of *action_id*."""
+        now = time.time() if now is None else now
+        key = action_key(action_id)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            if not self._valid(f.read()):
+                f.truncate(0)
+                f.write(_HEADER.pack(_MAGIC, self.slots) + bytes(self.slots * _SLOT.size))
+                f.flush()
+            with mmap.mmap(f.fileno(), 0) as mm:
+                target = weakest = None
+                # Evict the lowest score; among equals, the least recently used
+                weakest_rank = (float("inf"), float("inf"))
+                for slot in range(self.slots):
+                    pos = _HEADER.size + slot * _SLOT.size
+                    slot_key, score, stamp = _SLOT.unpack_from(mm, pos)
+                    if slot_key == key:
+                        target = (pos, decayed(score, stamp, now))
+                        break
+                    rank = (0.0, 0.0) if slot_key == _EMPTY else (decayed(score, stamp, now), stamp)
+                    if rank < weakest_rank:
+                        weakest, weakest_rank = pos, rank
+                if target is None:
+                    target = (weakest, 0.0)
+                pos, score = target
+                _SLOT.pack_into(mm, pos, key, score + 1.0, now)
+                mm.flush()
+
+    def record_quietly(self, action_id: str) -> None:
+        try:
+            self.record(action_id)
+        except OSError:
+            pass
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""Built-in clipboard history store.
+
+Item contents are appended to a log file. A separate index file holds one
+fixed-size record per entry (log offset, length, flags, timestamp, content
+hash) and is memory-mapped, so the picker only decodes the records it
+shows and opens in constant time however long the history grows.
+Re-adding known content appends a new index record that points at the
+existing bytes. Published records are never modified, so an open view of
+the index stays consistent; readers keep only the newest record of each
+content. Compaction rewrites live entries into a new log generation and
+swaps the index atomically.
+
+Usage:
+  store = ClipboardStore()
+  store.add("some text")
+  view = store.snapshot()       # newest first; len(view), view[i]
+"""
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+STORE_DIR = Path.home() / ".cache" / "kitty" / "clipboard-history"
+MAX_ENTRIES = 50_000
+
+_MAGIC = b"KCH1"
+# magic, log generation, live entries, live bytes
+_HEADER = struct.Struct("<4sIIQ4x")
+# log offset, length, flags, timestamp, content digest
+_ENTRY = struct.Struct("<QIId8s")
+_DIGEST_AT = 24
+
+
+def content_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=8).digest()
+
+
+class HistoryView(Sequence[str]):
+    """Read-only, newest-first view of the store as it was when opened.
+
+    Live record numbers are discovered lazily from the end of the index, so
+    showing the first screenful touches only a few dozen records. Records
+    are immutable and the mapping covers only the index as it was when the
+    view was opened, so later writers never change what the view shows; an
+    older record of content that appears again later is skipped.
+    """
+
+    def __init__(self, index: Optional[mmap.mmap] = None, log: Optional[mmap.mmap] = None, live: int = 0) -> None:
+        self._index = index
+        self._log = log
+        self._log_size = len(log) if log is not None else 0
+        self._count = live if index is not None else 0
+        self._cursor = (len(index) - _HEADER.size) // _ENTRY.size if index is not None else 0
+        self._live: List[int] = []
+        self._seen: set = set()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _record(self, i: int) -> Tuple[int, int, float]:
+        if i < 0:
+            i += self._count
+        while len(self._live) <= i and self._cursor > 0:
+            self._cursor -= 1
+            pos = _HEADER.size + self._cursor * _ENTRY.size
+            offset, length, _, _, key = _ENTRY.unpack_from(self._index, pos)
+            # Skip superseded content and records whose bytes never reached the log
+            if offset + length > self._log_size or (key, length) in self._seen:
+                continue
+            self._seen.add((key, length))
+            self._live.append(pos)
+        if not 0 <= i < len(self._live):
+            if self._cursor == 0:
+                self._count = len(self._live)
+            raise IndexError(i)
+        offset, length, _, stamp, _ = _ENTRY.unpack_from(self._index, self._live[i])
+        return offset, length, stamp
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        offset, length, _ = self._record(i)
+        return self._log[offset:offset + length].decode("utf-8", "replace")
+
+    def __iter__(self) -> Iterator[str]:
+        i = 0
+        while True:
+            try:
+                yield self[i]
+            except IndexError:
+                return
+            i += 1
+
+    def prefix(self, i: int, limit: int) -> str:
+        """Decode at most *limit* bytes from the start of entry *i*."""
+        offset, length, _ = self._record(i)
+        return self._log[offset:offset + min(length, limit)].decode("utf-8", "ignore")
+
+    def size(self, i: int) -> int:
+        """Size of entry *i* in bytes."""
+        return self._record(i)[1]
+
+    def timestamp(self, i: int) -> float:
+        return self._record(i)[2]
+
+    def close(self) -> None:
+        for mm in (self._index, self._log):
+            if mm is not None:
+                mm.close()
+        self._index = self._log = None
+        self._count = self._cursor = 0
+
+
+class ClipboardStore:
+    """Append-only clipboard history on disk, safe for concurrent writers."""
+
+    def __init__(self, directory: Path = STORE_DIR, max_entries: int = MAX_ENTRIES) -> None:
+        self.directory = directory
+        self.max_entries = max_entries
+        self.index_path = directory / "index"
+
+    def log_path(self, generation: int) -> Path:
+        return self.directory / f"log.{generation}"
+
+    @contextmanager
+    def _locked(self, shared: bool = False) -> Iterator[None]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "lock", "ab") as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def _header(data: bytes) -> Optional[Tuple[int, int, int]]:
+        if len(data) < _HEADER.size:
+            return None
+        magic, generation, live, live_bytes = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC:
+            return None
+        return generation, live, live_bytes
+
+    def _open_index(self):
+        """Open the index for writing, creating (or resetting) it if invalid."""
+        try:
+            f = open(self.index_path, "r+b")
+        except FileNotFoundError:
+            f = open(self.index_path, "w+b")
+        if self._header(f.read(_HEADER.size)) is None:
+            f.seek(0)
+            f.truncate()
+            f.write(_HEADER.pack(_MAGIC, 0, 0, 0))
+            f.flush()
+        return f
+
+    @staticmethod
+    def _find(mm: mmap.mmap, key: bytes, length: int) -> int:
+        """Byte position of the newest record with this content, or -1."""
+        end = len(mm)
+        while True:
+            pos = mm.rfind(key, _HEADER.size, end)
+            if pos < 0:
+                return -1
+            record = pos - _DIGEST_AT
+            if (record - _HEADER.size) % _ENTRY.size == 0:
+                rec_length = _ENTRY.unpack_from(mm, record)[1]
+                if rec_length == length:
+                    return record
+            end = pos + len(key) - 1
+
+    def add(self, text: str, touch: bool = True) -> bool:
+        """Record *text* as the newest entry.
+
+        Known content is moved to the top without rewriting its bytes; with
+        ``touch=False`` it is left where it is. Returns True if the history
+        changed.
+        """
+        data = text.encode("utf-8", "replace")
+        if not data.strip():
+            return False
+        key = content_digest(data)
+        with self._locked(), self._open_index() as f:
+            size = os.fstat(f.fileno()).st_size
+            with mmap.mmap(f.fileno(), size) as mm:
+                generation, live, live_bytes = self._header(mm)
+                found = self._find(mm, key, len(data))
+                if found >= 0:
+                    if not touch or found + _ENTRY.size == size:
+                        return False
+                    # The new record supersedes the old one; readers skip it
+                    offset = _ENTRY.unpack_from(mm, found)[0]
+                else:
+                    with open(self.log_path(generation), "ab") as log:
+                        offset = log.tell()
+                        log.write(data)
+                    live += 1
+                    live_bytes += len(data)
+                _HEADER.pack_into(mm, 0, _MAGIC, generation, live, live_bytes)
+            f.seek(0, os.SEEK_END)
+            f.write(_ENTRY.pack(offset, len(data), 0, time.time(), key))
+        return True
+
+    def seed(self, items: Sequence[str]) -> None:
+        """Import *items* (newest first) without reordering known entries."""
+        for text in reversed(items):
+            self.add(text, touch=False)
+
+    def snapshot(self) -> HistoryView:
+        """Map the current history read-only; empty if there is none yet."""
+        try:
+            with self._locked(shared=True):
+                with open(self.index_path, "rb") as f:
+                    header = self._header(f.read(_HEADER.size))
+                    if header is None or os.fstat(f.fileno()).st_size <= _HEADER.size:
+                        return HistoryView()
+                    index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                generation, live, _ = header
+                log: Optional[mmap.mmap] = None
+                with open(self.log_path(generation), "rb") as f:
+                    if os.fstat(f.fileno()).st_size:
+                        log = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return HistoryView()
+        if log is None:
+            index.close()
+            return HistoryView()
+        return HistoryView(index, log, live)
+
+    def needs_compaction(self) -> bool:
+        try:
+            with open(self.index_path, "rb") as f:
+                header = self._header(f.read(_HEADER.size))
+                index_size = os.fstat(f.fileno()).st_size
+            if header is None:
+                return False
+            generation, live, live_bytes = header
+            log_size = self.log_path(generation).stat().st_size
+        except OSError:
+            return False
+        dead = (index_size - _HEADER.size) // _ENTRY.size - live
+        return live > self.max_entries or dead > max(1024, live) or log_size > 2 * live_bytes + (1 << 20)
+
+    def compact(self) -> None:
+        """Rewrite the newest live entries into a fresh log generation."""
+        with self._locked(), open(self.index_path, "rb") as f:
+            index = f.read()
+            header = self._header(index)
+            if header is None:
+                return
+            generation, _, _ = header
+            records: List[Tuple[int, int, float, bytes]] = []
+            seen = set()
+            for pos in range(len(index) - _ENTRY.size, _HEADER.size - 1, -_ENTRY.size):
+                offset, length, _, stamp, key = _ENTRY.unpack_from(index, pos)
+                if (key, length) in seen:
+                    continue
+                seen.add((key, length))
+                records.append((offset, length, stamp, key))
+                if len(records) >= self.max_entries:
+                    break
+            old_log = self.log_path(generation)
+            new_log = self.log_path(generation + 1)
+            entries = []
+            live_bytes = 0
+            with open(old_log, "rb") as src, open(new_log, "wb") as dst:
+                for offset, length, stamp, key in reversed(records):
+                    src.seek(offset)
+                    data = src.read(length)
+                    if len(data) != length:
+                        continue
+                    entries.append(_ENTRY.pack(dst.tell(), length, 0, stamp, key))
+                    dst.write(data)
+                    live_bytes += length
+                dst.flush()
+                os.fsync(dst.fileno())
+            tmp = self.index_path.with_name(f".index.{os.getpid()}.tmp")
+            with open(tmp, "wb") as out:
+                out.write(_HEADER.pack(_MAGIC, generation + 1, len(entries), live_bytes))
+                out.write(b"".join(entries))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, self.index_path)
+            # Open views keep their mapping of the old log after the unlink
+            old_log.unlink(missing_ok=True)
+
+    def compact_in_background(self) -> Optional[threading.Thread]:
+        """Start compaction on a worker thread if the files have enough waste."""
+        if not self.needs_compaction():
+            return None
+        worker = threading.Thread(target=self._compact_quietly, name="clip-store-compact")
+        worker.start()
+        return worker
+
+    def _compact_quietly(self) -> None:
+        try:
+            self.compact()
+        except OSError:
+            pass
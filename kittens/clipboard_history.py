@@ -6,190 +6,462 @@ Integrates with system clipboard managers:
 - clipster (X11)
 - copyq (Cross-platform)
 
+Keeps its own persistent history (see clip_store.py) and opens from it;
+on every open the newest entries of the external manager are merged in
+(only content the store has not seen is added). It can also be fed from a
+clipboard watcher, e.g.:
+
+  wl-paste --watch python3 ~/.config/kitty/kittens/clipboard_history.py --add
+
 Falls back to kitty's built-in clipboard if no manager is detected.
 """
 from __future__ import annotations
 
 import curses
+import os
+import shutil
+import signal
 import subprocess
-from typing import List, Optional, Tuple
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from clip_store import ClipboardStore, HistoryView
+from list_view import ACCEPT, BLANK, CANCEL, ESC, Line, ListView, text_line
+
+
+BACKEND_CACHE = Path.home() / ".cache" / "kitty" / "clipboard-backend"
+# Search looks at this much of each item; enough for any realistic query
+SEARCH_KEY_CHARS = 4096
+# Previews are built from this many leading characters, then cut to width
+PREVIEW_CHARS = 512
+# Newest manager entries merged into the store on each open
+MERGE_ENTRIES = 200
+
+
+class Probe:
+    """Cancellation scope for one concurrent probe of the managers.
+
+    Each probe_backends call gets its own, so cancelling the losers of one
+    probe never affects later backend calls (such as the kitty fallback).
+    """
+
+    def __init__(self) -> None:
+        self.cancelled = threading.Event()
+        self.children: Set[subprocess.Popen] = set()
+        self.lock = threading.Lock()
+
+    def cancel(self) -> None:
+        """Kill backend commands still running once a winner is known."""
+        with self.lock:
+            self.cancelled.set()
+            for proc in self.children:
+                kill_group(proc)
+
+
+def run_backend(argv: List[str], timeout: float, probe: Optional[Probe] = None) -> Optional[str]:
+    """Run a clipboard manager command; stdout, or None on failure or timeout.
+
+    Within a *probe*, nothing starts once the probe is cancelled, and
+    running commands are killed by ``probe.cancel()``.
+    """
+    with probe.lock if probe is not None else nullcontext():
+        if probe is not None and probe.cancelled.is_set():
+            return None
+        try:
+            proc = subprocess.Popen(
+                argv,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                start_new_session=True,
+            )
+        except OSError:
+            return None
+        if probe is not None:
+            probe.children.add(proc)
+    try:
+        out, _ = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_group(proc)
+        proc.communicate()
+        return None
+    finally:
+        if probe is not None:
+            with probe.lock:
+                probe.children.discard(proc)
+    return out if proc.returncode == 0 else None
 
 
-def get_clipman_history() -> Optional[List[str]]:
-    """Get clipboard history from clipman (Wayland)."""
+def kill_group(proc: subprocess.Popen) -> None:
+    """Kill *proc* and anything it spawned (which would hold stdout open)."""
     try:
-        result = subprocess.run(
-            ["clipman", "show-history"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        items = [line.strip() for line in result.stdout.splitlines() if line.strip()]
-        return items if items else None
-    except (FileNotFoundError, subprocess.CalledProcessError):
+        os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def get_clipman_history(timeout: float = 1.0, probe: Optional[Probe] = None) -> Optional[List[str]]:
+    """Get clipboard history from clipman (Wayland)."""
+    out = run_backend(["clipman", "show-history"], timeout, probe)
+    if out is None:
         return None
+    items = [line.strip() for line in out.splitlines() if line.strip()]
+    return items if items else None
 
 
-def get_copyq_history() -> Optional[List[str]]:
+def get_copyq_history(timeout: float = 2.0, probe: Optional[Probe] = None) -> Optional[List[str]]:
     """Get clipboard history from CopyQ."""
-    try:
-        result = subprocess.run(
-            ["copyq", "eval", "for(i=0;i<20;i++)print(str(read(i))+'\\n---\\n')"],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=2,
-        )
-        items = [
-            item.strip()
-            for item in result.stdout.split("---")
-            if item.strip()
-        ]
-        return items if items else None
-    except (FileNotFoundError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+    out = run_backend(["copyq", "eval", "for(i=0;i<20;i++)print(str(read(i))+'\\n---\\n')"], timeout, probe)
+    if out is None:
         return None
+    items = [
+        item.strip()
+        for item in out.split("---")
+        if item.strip()
+    ]
+    return items if items else None
 
 
-def get_clipster_history() -> Optional[List[str]]:
+def get_clipster_history(timeout: float = 1.0, probe: Optional[Probe] = None) -> Optional[List[str]]:
     """Get clipboard history from clipster (X11)."""
+    out = run_backend(["clipster", "-o", "-n", "20"], timeout, probe)
+    if out is None:
+        return None
+    items = [line.strip() for line in out.splitlines() if line.strip()]
+    return items if items else None
+
+
+# Probed in this order of preference; each runs under its own deadline
+BACKENDS: Dict[str, Callable[..., Optional[List[str]]]] = {
+    "clipman": get_clipman_history,
+    "copyq": get_copyq_history,
+    "clipster": get_clipster_history,
+}
+
+
+def read_cached_backend() -> Optional[str]:
     try:
-        result = subprocess.run(
-            ["clipster", "-o", "-n", "20"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        items = [line.strip() for line in result.stdout.splitlines() if line.strip()]
-        return items if items else None
-    except (FileNotFoundError, subprocess.CalledProcessError):
+        name = BACKEND_CACHE.read_text().strip()
+    except OSError:
         return None
+    return name if name in BACKENDS else None
 
 
-def get_clipboard_history() -> Tuple[List[str], str]:
-    """Get clipboard history from available manager."""
-    # Try different clipboard managers
-    history = get_clipman_history()
-    if history:
-        return history, "clipman"
+def write_cached_backend(name: Optional[str]) -> None:
+    try:
+        if name is None:
+            BACKEND_CACHE.unlink(missing_ok=True)
+        else:
+            BACKEND_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            BACKEND_CACHE.write_text(name + "\n")
+    except OSError:
+        pass
 
-    history = get_copyq_history()
-    if history:
-        return history, "copyq"
 
-    history = get_clipster_history()
-    if history:
-        return history, "clipster"
+def probe_backends(names: List[str]) -> Optional[Tuple[List[str], str]]:
+    """Query *names* concurrently and take the first non-empty history."""
+    if not names:
+        return None
+    probe = Probe()
+    pool = ThreadPoolExecutor(max_workers=len(names))
+    futures = {pool.submit(BACKENDS[name], probe=probe): name for name in names}
+    try:
+        for future in as_completed(futures):
+            items = future.result()
+            if items:
+                return items, futures[future]
+    finally:
+        probe.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+    return None
+
+
+def get_manager_history() -> Optional[Tuple[List[str], str]]:
+    """Get clipboard history from an external clipboard manager.
+
+    The manager found last time is asked first, alone; only if it fails are
+    all installed managers probed concurrently and the cache updated.
+    """
+    cached = read_cached_backend()
+    if cached and shutil.which(cached):
+        items = BACKENDS[cached]()
+        if items:
+            return items, cached
+    # Skip managers that are not installed instead of paying a failed exec
+    installed = [name for name in BACKENDS if name != cached and shutil.which(name)]
+    found = probe_backends(installed)
+    write_cached_backend(found[1] if found else None)
+    return found
+
+
+def get_clipboard_history(store: ClipboardStore) -> Tuple[Sequence[str], str]:
+    """Get clipboard history: the built-in store, topped up from the manager."""
+    found = get_manager_history()
+    if found:
+        try:
+            store.seed(found[0][:MERGE_ENTRIES])
+        except OSError:
+            pass
+    view = store.snapshot()
+    if len(view):
+        return view, "builtin"
+    if found:
+        return found
 
     # Fallback: just return current clipboard
-    try:
-        result = subprocess.run(
-            ["kitty", "@", "get-text", "clipboard"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        current = result.stdout.strip()
-        return [current] if current else ["(empty)"], "kitty"
-    except (FileNotFoundError, subprocess.CalledProcessError):
+    out = run_backend(["kitty", "@", "get-text", "clipboard"], 2.0)
+    if out is None:
         return ["(no clipboard access)"], "none"
+    current = out.strip()
+    return [current] if current else ["(empty)"], "kitty"
+
 
+def set_clipboard(text: str) -> bool:
+    """Set clipboard content without passing it through argv.
 
-def set_clipboard(text: str) -> None:
-    """Set clipboard content."""
+    Inside kitty (handle_result) the clipboard is set in-process; standalone
+    the text is streamed on stdin to ``kitten clipboard``.
+    """
+    try:
+        from kitty.clipboard import set_clipboard_string
+    except ImportError:
+        pass
+    else:
+        set_clipboard_string(text)
+        return True
     try:
         subprocess.run(
-            ["kitty", "@", "set-clipboard", text],
+            ["kitten", "clipboard"],
+            input=text.encode("utf-8", "replace"),
             check=True,
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
+            timeout=10,
         )
-    except (FileNotFoundError, subprocess.CalledProcessError):
-        pass
+        return True
+    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return False
 
 
 def truncate_display(text: str, max_len: int = 80) -> str:
     """Truncate text for display, replacing newlines."""
-    text = text.replace("\n", " ⏎ ").replace("\r", "")
-    if len(text) > max_len:
+    # Slice before replacing so a huge item is never copied whole
+    clipped = len(text) > max_len
+    text = text[:max_len].replace("\n", " ⏎ ").replace("\r", "")
+    if clipped or len(text) > max_len:
         return text[: max_len - 1] + "…"
     return text
 
 
-def picker_ui(stdscr, items: List[str], manager: str):
+def format_size(size: int) -> str:
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def item_prefix(items: Sequence[str], idx: int, limit: int) -> str:
+    """First *limit* characters of an item, without decoding all of a stored one."""
+    if isinstance(items, HistoryView):
+        # UTF-8 needs at most 4 bytes per character
+        return items.prefix(idx, limit * 4)[:limit]
+    return items[idx][:limit]
+
+
+def item_size(items: Sequence[str], idx: int) -> int:
+    if isinstance(items, HistoryView):
+        return items.size(idx)
+    return len(items[idx].encode("utf-8", "replace"))
+
+
+class Previews:
+    """Per-item display line and size, computed once from a bounded prefix."""
+
+    def __init__(self, items: Sequence[str]) -> None:
+        self.items = items
+        self._cache: Dict[int, Tuple[str, str]] = {}
+
+    def get(self, idx: int) -> Tuple[str, str]:
+        cached = self._cache.get(idx)
+        if cached is None:
+            text = item_prefix(self.items, idx, PREVIEW_CHARS + 1)
+            cached = self._cache[idx] = (truncate_display(text, PREVIEW_CHARS), format_size(item_size(self.items, idx)))
+        return cached
+
+
+class MatchSet:
+    """Indices of items matching one query, discovered lazily in order."""
+
+    def __init__(self, source: Iterator[int], test: Callable[[int], bool]) -> None:
+        self.found: List[int] = []
+        self.complete = False
+        self._source = source
+        self._test = test
+
+    def ensure(self, n: int) -> None:
+        """Scan until at least *n* matches are known or the source runs out."""
+        if self.complete or len(self.found) >= n:
+            return
+        for idx in self._source:
+            if self._test(idx):
+                self.found.append(idx)
+                if len(self.found) >= n:
+                    return
+        self.complete = True
+
+    def iter_all(self) -> Iterator[int]:
+        """Every match, extending the scan only as far as the consumer reads."""
+        k = 0
+        while True:
+            if k >= len(self.found):
+                self.ensure(k + 1)
+                if k >= len(self.found):
+                    return
+            yield self.found[k]
+            k += 1
+
+
+class IncrementalSearch:
+    """Type-to-filter over a large history.
+
+    A query matches an item when every whitespace-separated term occurs in
+    it, case-insensitively. Extending a query can only shrink its result,
+    so a new query scans the matches of the longest cached query it extends
+    instead of the whole history. Lowercased keys are built once per item.
+    """
+
+    def __init__(self, items: Sequence[str]) -> None:
+        self.items = items
+        self._keys: List[Optional[str]] = [None] * len(items)
+        self._everything = MatchSet(iter(range(len(items))), lambda idx: True)
+        self._cache: Dict[str, MatchSet] = {}
+
+    def key(self, idx: int) -> str:
+        key = self._keys[idx]
+        if key is None:
+            key = self._keys[idx] = item_prefix(self.items, idx, SEARCH_KEY_CHARS).lower()
+        return key
+
+    def matches(self, query: str) -> MatchSet:
+        terms = query.lower().split()
+        normalized = " ".join(terms)
+        if not terms:
+            return self._everything
+        cached = self._cache.get(normalized)
+        if cached is not None:
+            return cached
+        parent = self._everything
+        for end in range(len(normalized) - 1, 0, -1):
+            narrower = self._cache.get(normalized[:end])
+            if narrower is not None:
+                parent = narrower
+                break
+        key = self.key
+        result = MatchSet(parent.iter_all(), lambda idx: all(term in key(idx) for term in terms))
+        self._cache[normalized] = result
+        return result
+
+
+def picker_ui(stdscr, items: Sequence[str], manager: str):
     """Interactive clipboard history picker."""
     curses.curs_set(0)
     stdscr.nodelay(False)
-    stdscr.keypad(True)
 
-    selected_idx = 0
+    search = IncrementalSearch(items)
+    previews = Previews(items)
+    query = ""
+    view = ListView(stdscr)
+    title = text_line(
+        f"Clipboard History ({manager}) — Arrow keys: navigate | /: search | Enter: paste | Esc/q: cancel",
+        curses.A_BOLD,
+    )
 
     while True:
-        stdscr.clear()
-        h, w = stdscr.getmaxyx()
-
-        # Header
-        title = f"Clipboard History ({manager}) — Arrow keys: navigate | Enter: paste | Esc/q: cancel"
-        stdscr.addnstr(0, 0, title, w - 1, curses.A_BOLD)
-
-        # Item list
-        visible_lines = h - 3
-        scroll_offset = max(0, selected_idx - visible_lines + 1)
-
-        for idx in range(scroll_offset, min(scroll_offset + visible_lines, len(items))):
-            y_pos = 2 + (idx - scroll_offset)
-            if y_pos >= h:
-                break
-
-            item = items[idx]
-            display = truncate_display(item, w - 5)
+        matches = search.matches(query)
+        found = matches.found
+        # Only match as far as the screen needs; the rest is found on scroll
+        matches.ensure(max(view.selected, view.top) + stdscr.getmaxyx()[0])
 
+        def row(pos: int, selected: bool, width: int) -> Line:
+            preview, size = previews.get(found[pos])
             # Highlight selected
-            attr = curses.A_REVERSE if idx == selected_idx else curses.A_NORMAL
-
-            # Number prefix
-            prefix = f"{idx + 1}. "
-            stdscr.addnstr(y_pos, 2, prefix, w - 3, attr)
-            stdscr.addnstr(y_pos, 2 + len(prefix), display, w - 3 - len(prefix), attr)
-
-        stdscr.refresh()
+            attr = curses.A_REVERSE if selected else curses.A_NORMAL
+            # Number prefix, size right-aligned
+            prefix = f"{pos + 1}. "
+            size_col = f" {size:>9}"
+            room = width - 2 - len(prefix) - len(size_col)
+            display = truncate_display(preview, room) if len(preview) > room else preview
+            return ((2, prefix, attr), (2 + len(prefix), display, attr), (-len(size_col), size_col, attr))
+
+        if view.typing or query:
+            count = f"{len(found)}" if matches.complete else f"{len(found)}+"
+            status = text_line(f"/{query}  ({count} matches)")
+        else:
+            status = BLANK
+        view.render((title, status), len(found), row)
 
         # Handle input
         ch = stdscr.getch()
 
-        if ch in (ord("q"), 27):  # q or Esc
+        if view.typing:
+            if ch == ESC:  # Esc leaves search and clears the filter
+                view.typing = False
+                query = ""
+                view.selected = 0
+                continue
+            elif ch in (curses.KEY_BACKSPACE, 127, 8):
+                query = query[:-1]
+                view.selected = 0
+                continue
+            elif 32 <= ch <= 126:  # Printable characters
+                query += chr(ch)
+                view.selected = 0
+                continue
+
+        if ch == curses.KEY_END or (ch == ord("G") and not view.typing):
+            matches.ensure(len(items))
+        action = view.handle(ch, len(found))
+        if action == CANCEL:
             return None
-        elif ch in (curses.KEY_ENTER, 10, 13):  # Enter
-            return items[selected_idx]
-        elif ch in (curses.KEY_UP, ord("k")):
-            selected_idx = max(0, selected_idx - 1)
-        elif ch in (curses.KEY_DOWN, ord("j")):
-            selected_idx = min(len(items) - 1, selected_idx + 1)
-        elif ch in (curses.KEY_PPAGE,):  # Page Up
-            selected_idx = max(0, selected_idx - 10)
-        elif ch in (curses.KEY_NPAGE,):  # Page Down
-            selected_idx = min(len(items) - 1, selected_idx + 10)
-        elif ch in (curses.KEY_HOME,):
-            selected_idx = 0
-        elif ch in (curses.KEY_END,):
-            selected_idx = len(items) - 1
-        elif ord("1") <= ch <= ord("9"):  # Number shortcuts
-            num = ch - ord("1")
-            if num < len(items):
-                return items[num]
+        elif action == ACCEPT:
+            return items[found[view.selected]] if found else None
+        elif action is None:
+            if ch == ord("/"):
+                view.typing = True
+            elif ord("1") <= ch <= ord("9"):  # Number shortcuts
+                num = ch - ord("1")
+                matches.ensure(num + 1)
+                if num < len(found):
+                    return items[found[num]]
 
 
 def main(args: list[str]) -> str:
     """Entry point - returns selected clipboard item."""
-    items, manager = get_clipboard_history()
+    store = ClipboardStore()
+    items, manager = get_clipboard_history(store)
 
     if not items:
         return "ERROR: No clipboard history available"
 
+    # Compaction swaps files under the lock; the open view keeps its mapping
+    compactor = store.compact_in_background()
     try:
         selected = curses.wrapper(picker_ui, items, manager)
-        return selected or ""
     except Exception as e:
         return f"ERROR: {e}"
+    if compactor is not None:
+        compactor.join()
+    if selected and manager not in ("kitty", "none"):
+        try:
+            store.add(selected)
+        except OSError:
+            pass
+    return selected or ""
 
 
 def handle_result(args: list[str], answer: str, target_window_id: int, boss) -> None:
@@ -210,12 +482,23 @@ def handle_result(args: list[str], answer: str, target_window_id: int, boss) ->
         print(f"✗ Failed to paste: {e}")
 
 
+def add_from_stdin() -> None:
+    """Append stdin to the history (for clipboard watchers)."""
+    text = sys.stdin.buffer.read().decode("utf-8", "replace")
+    store = ClipboardStore()
+    if store.add(text) and store.needs_compaction():
+        store.compact()
+
+
 if __name__ == "__main__":
-    import sys
+    if sys.argv[1:] == ["--add"]:
+        add_from_stdin()
+        raise SystemExit(0)
 
-    # Test standalone
+    # Standalone (overlay): copy the selection to the clipboard
     item = main(sys.argv[1:])
     if item and not item.startswith("ERROR:"):
-        print(f"Selected: {truncate_display(item, 60)}")
+        copied = "copied" if set_clipboard(item) else "not copied"
+        print(f"Selected: {truncate_display(item, 60)} ({format_size(len(item.encode('utf-8', 'replace')))}, {copied})")
     elif item:
         print(item)
@@ -1,138 +1,143 @@
 #!/usr/bin/env python3
 """Minimal command palette for Kitty.
 
-Provides quick access to common window/tab actions and config utilities.
+Provides quick access to common window/tab actions and config utilities,
+plus every key binding, script, session and theme discovered by
+action_index (cached by file mtime, searched through a token index).
+Actions run often and recently rank first (action_usage).
+
+Run as a kitten (``kitten kittens/command_palette.py``): the UI only
+returns the chosen action ID, and handle_result dispatches it inside kitty
+through ``boss.combine``, so a multi-step action is one in-process
+sequence rather than one remote-control round-trip per step. Run as a
+plain script it falls back to remote control.
 """
 from __future__ import annotations
 
 import curses
-import os
-import subprocess
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, List
+from typing import Optional
+
+from action_index import ActionEntry, ActionMatcher, find_action, load_actions
+from action_usage import UsageStore
+from list_view import ACCEPT, BLANK, CANCEL, Line, ListView, text_line
+from rc_client import rc
 
 HOME = Path.home()
 CFG = HOME / ".config" / "kitty"
+CURRENT_THEME_FILE = CFG / "themes" / "current-theme.conf"
 
 
-def rc(*args: str) -> None:
-    try:
-        subprocess.run(["kitty", "@", *args], check=False)
-    except Exception:
-        pass
-
-
-def launch(typ: str, title: str, *cmd: str) -> None:
-    rc("launch", f"--type={typ}", f"--title={title}", *cmd)
-
-
-@dataclass
-class Action:
-    label: str
-    desc: str
-    run: Callable[[], None]
-
-
-def build_actions() -> List[Action]:
-    actions: List[Action] = []
-    A = actions.append
-
-    # Windows/Tabs
-    A(Action("New Tab", "Open a new tab in CWD", lambda: rc("launch", "--type=tab")))
-    A(Action("New Window", "Open a new window in CWD", lambda: rc("launch", "--type=window")))
-    A(Action("New OS Window", "Open a new OS window", lambda: rc("launch", "--type=os-window")))
-    A(Action("Horizontal Split", "Split window horizontally", lambda: rc("launch", "--location=hsplit")))
-    A(Action("Vertical Split", "Split window vertically", lambda: rc("launch", "--location=vsplit")))
-    A(Action("Toggle Fullscreen", "Fullscreen the current window", lambda: rc("toggle-fullscreen")))
-    A(Action("Toggle Maximized", "Maximize the current window", lambda: rc("toggle-maximized")))
-    A(Action("Clear Terminal", "Reset the active terminal", lambda: rc("send-text", "reset\n")))
-
-    # Config helpers
-    A(Action("Edit Config", "Open kitty.conf in $EDITOR", lambda: launch(
-        "overlay", "Edit Config", "sh", "-lc", f"${{EDITOR:-nvim}} {os.fspath(CFG/'kitty.conf')}"
-    )))
-    A(Action("Reload Config", "Reload configuration", lambda: rc("load-config")))
-    A(Action("Debug Config", "Open debug view", lambda: rc("debug-config")))
-    A(Action("Help Center", "Searchable help", lambda: launch(
-        "overlay", "Help", "python3", os.fspath(CFG/"kittens"/"help_center.py")
-    )))
-
-    return actions
-
-
-def match_score(q: str, label: str, desc: str) -> int:
-    q = q.lower().strip()
-    if not q:
-        return 1
-    s = 0
-    target = f"{label} {desc}".lower()
-    for part in q.split():
-        if part in target:
-            s += 2
-        for token in label.lower().split():
-            if token.startswith(part):
-                s += 3
-    return s
-
+def write_current_theme(name: str) -> None:
+    CURRENT_THEME_FILE.write_text(f"include {name}.conf\n")
 
-def palette(stdscr):
-    curses.curs_set(1)
-    stdscr.nodelay(False)
-    stdscr.keypad(True)
-    actions = build_actions()
-    query = ""
-    sel = 0
 
-    def current_list():
-        scored = [(
-            match_score(query, a.label, a.desc), a
-        ) for a in actions]
-        scored.sort(key=lambda t: (-t[0], t[1].label))
-        return [a for sc, a in scored if sc > 0]
+def run_action(action: ActionEntry) -> Optional[str]:
+    """Dispatch *action* over remote control; returns an error, or None."""
+    if action.kind == "theme":
+        write_current_theme(action.target)
+        response = rc("load-config")
+        return None if response and response.get("ok") else (response or {}).get("error", "kitty not reachable")
+    for step in action.steps:
+        response = rc("action", action=step)
+        if not response or not response.get("ok"):
+            return f"{step}: {(response or {}).get('error', 'kitty not reachable')}"
+    return None
 
-    items = current_list()
 
-    def redraw():
-        nonlocal items
-        stdscr.clear()
-        h, w = stdscr.getmaxyx()
-        stdscr.addnstr(0, 0, "Command Palette — type to filter | Enter: run | q: quit", w-1, curses.A_BOLD)
-        stdscr.addnstr(1, 0, "> " + query, w-1)
+def dispatch(action: ActionEntry, boss, window=None) -> Optional[str]:
+    """Dispatch *action* inside kitty; returns an error, or None."""
+    if action.kind == "theme":
+        write_current_theme(action.target)
+        boss.load_config_file()
+        return None
+    for step in action.steps:
+        if not boss.combine(step, window_for_dispatch=window):
+            return f"{step}: not a valid action"
+        # Later steps follow whatever the earlier ones focused (a new tab, a split)
+        window = None
+    return None
 
-        items = current_list()
-        for idx, action in enumerate(items[: h - 3]):
-            attr = curses.A_REVERSE if idx == sel else curses.A_NORMAL
-            stdscr.addnstr(3 + idx, 0, action.label, w-1, attr)
-            stdscr.addnstr(3 + idx, min(30, w - 1), " — " + action.desc, w-1, attr)
-        stdscr.refresh()
 
-    redraw()
+def palette(stdscr):
+    curses.curs_set(1)
+    stdscr.nodelay(False)
+    actions = load_actions()
+    matcher = ActionMatcher(actions, UsageStore().scores_for(action.id for action in actions))
+    query = ""
+    view = ListView(stdscr, typing=True)
 
     while True:
+        items = matcher.filter(query)
+
+        def row(idx: int, selected: bool, width: int) -> Line:
+            action = items[idx]
+            attr = curses.A_REVERSE if selected else curses.A_NORMAL
+            line = ((0, action.label[:29], attr), (min(30, width), " — " + action.desc, attr))
+            if action.keys:
+                keys = f" {action.keys} "
+                line += ((-len(keys), keys, attr | curses.A_DIM),)
+            return line
+
+        prompt = "> " + query
+        header = (
+            text_line("Command Palette — type to filter | Enter: run | Esc: quit", curses.A_BOLD),
+            text_line(prompt),
+            BLANK,
+        )
+        view.render(header, len(items), row, cursor=(1, len(prompt)))
+
         ch = stdscr.getch()
-        if ch in (ord('q'), 27):
-            return
-        elif ch in (curses.KEY_ENTER, 10, 13):
-            if items:
-                items[sel].run()
-            return
-        elif ch in (curses.KEY_UP,):
-            sel = max(0, sel - 1)
-        elif ch in (curses.KEY_DOWN,):
-            sel = min(max(0, len(items) - 1), sel + 1)
-        elif ch in (curses.KEY_BACKSPACE, 127):
-            query = query[:-1]
-            sel = 0
-        elif ch >= 32 and ch <= 126:
-            query += chr(ch)
-            sel = 0
-        redraw()
-
-
-def main():
-    curses.wrapper(palette)
+        action = view.handle(ch, len(items))
+        if action == CANCEL:
+            return None
+        elif action == ACCEPT:
+            return items[view.selected] if items else None
+        elif action is None:
+            if ch in (curses.KEY_BACKSPACE, 127, 8):
+                query = query[:-1]
+                view.selected = 0
+            elif ch >= 32 and ch <= 126:
+                query += chr(ch)
+                view.selected = 0
+
+
+def main(args: list[str]) -> str:
+    """Entry point - returns the selected action ID."""
+    try:
+        selected = curses.wrapper(palette)
+        return selected.id if selected else ""
+    except Exception as e:
+        return f"ERROR: {e}"
+
+
+def handle_result(args: list[str], answer: str, target_window_id: int, boss) -> None:
+    """Run the selected action in-process against *boss*."""
+    if not answer or answer.startswith("ERROR:"):
+        if answer.startswith("ERROR:"):
+            print(answer)
+        return
+
+    action = find_action(answer)
+    if action is None:
+        print(f"✗ Unknown action: {answer}")
+        return
+    try:
+        error = dispatch(action, boss, boss.window_id_map.get(target_window_id))
+    except Exception as e:
+        error = str(e)
+    if error:
+        print(f"✗ {action.label} failed: {error}")
+        return
+    # Usage is written only once the action is on its way
+    UsageStore().record_quietly(action.id)
 
 
 if __name__ == "__main__":
-    main()
+    selected = curses.wrapper(palette)
+    if selected is not None:
+        error = run_action(selected)
+        if error:
+            print(f"✗ {selected.label} failed: {error}")
+        else:
+            UsageStore().record_quietly(selected.id)
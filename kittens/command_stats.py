@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Command Stats - p50/p95/p99 durations of shell commands.
+
+The activity watcher records how long every command takes (via shell
+integration) into log-bucketed histograms. Run as a kitten, this snapshots
+the live histograms from the watcher and opens a report overlay:
+
+  map kitty_mod+p>shift+s kitten kittens/command_stats.py
+
+Standalone, it prints the report from the last snapshot:
+
+  python3 command_stats.py [--window ID]
+"""
+from __future__ import annotations
+
+import os
+import sys
+from typing import Optional
+
+from duration_histogram import ALL_WINDOWS, SNAPSHOT_FILE, CommandStats, format_table
+
+try:
+    from kittens.tui.handler import result_handler
+except ImportError:  # standalone python3, outside kitty
+    def result_handler(**kwargs):
+        return lambda func: func
+
+
+def live_stats() -> Optional[CommandStats]:
+    """Find the histograms held by the running activity watcher."""
+    try:
+        from kitty.launch import watcher_modules
+    except ImportError:
+        return None
+    for namespace in watcher_modules.values():
+        if isinstance(namespace, dict) and isinstance(namespace.get("_CMD_STATS"), CommandStats):
+            return namespace["_CMD_STATS"]
+    return None
+
+
+def build_report(stats: CommandStats, window_id: Optional[int] = None) -> str:
+    lines = ["Command durations — all windows", ""]
+    if not stats.by_command:
+        lines.append("  (no commands recorded yet — is shell integration enabled?)")
+    lines.extend(format_table(stats.by_command))
+    windows = [window_id] if window_id is not None else sorted(stats.by_window)
+    for wid in windows:
+        table = stats.by_window.get(wid)
+        if not table or wid == ALL_WINDOWS:
+            continue
+        lines += ["", f"Window {wid}", ""]
+        lines.extend(format_table(table, limit=10))
+    return "\n".join(lines) + "\n"
+
+
+def main(args: list[str]) -> str:
+    """Unused: the report is produced in handle_result (no UI)."""
+    return ""
+
+
+@result_handler(no_ui=True)
+def handle_result(args: list[str], answer: str, target_window_id: int, boss) -> None:
+    """Snapshot the live histograms and show them in an overlay."""
+    stats = live_stats()
+    if stats is not None:
+        try:
+            stats.dump(SNAPSHOT_FILE)
+        except OSError as e:
+            print(f"✗ Failed to snapshot command stats: {e}")
+            return
+    script = os.path.abspath(__file__)
+    boss.call_remote_control(None, (
+        "launch",
+        "--type=overlay",
+        "--title=Command Stats",
+        "bash",
+        "-lc",
+        f"python3 '{script}' --window {target_window_id} | less -R",
+    ))
+
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    window: Optional[int] = None
+    if len(argv) == 2 and argv[0] == "--window":
+        window = int(argv[1])
+    loaded = CommandStats.load(SNAPSHOT_FILE)
+    if loaded is None:
+        print(f"No command stats snapshot at {SNAPSHOT_FILE}")
+        raise SystemExit(1)
+    sys.stdout.write(build_report(loaded, window))
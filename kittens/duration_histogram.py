@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Fixed-memory, log-bucketed command duration histograms.
+
+Shared by the activity watcher, which records a duration every time a shell
+command finishes, and the command_stats kitten, which reports percentiles.
+"""
+from __future__ import annotations
+
+import math
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+# Bucket 0 holds everything under MIN_SECONDS; bucket i covers
+# [MIN_SECONDS * 2**((i-1)/BUCKETS_PER_OCTAVE), MIN_SECONDS * 2**(i/BUCKETS_PER_OCTAVE)).
+# 4 buckets per octave keeps the relative error under ~19%, and 112 buckets
+# reach from 1ms to roughly three days.
+MIN_SECONDS = 0.001
+BUCKETS_PER_OCTAVE = 4
+NUM_BUCKETS = 112
+
+OTHER = "(other)"
+ALL_WINDOWS = 0
+SNAPSHOT_FILE = Path.home() / ".cache" / "kitty" / "cmd-stats.bin"
+
+_MAGIC = b"KCS1"
+_HEADER = struct.Struct("<4sI")
+_RECORD = struct.Struct("<IHIddH")
+_BUCKET = struct.Struct("<HI")
+
+
+def bucket_index(seconds: float) -> int:
+    if seconds < MIN_SECONDS:
+        return 0
+    idx = int(math.log2(seconds / MIN_SECONDS) * BUCKETS_PER_OCTAVE) + 1
+    return min(idx, NUM_BUCKETS - 1)
+
+
+def bucket_bounds(idx: int) -> Tuple[float, float]:
+    if idx == 0:
+        return 0.0, MIN_SECONDS
+    lo = MIN_SECONDS * 2 ** ((idx - 1) / BUCKETS_PER_OCTAVE)
+    hi = MIN_SECONDS * 2 ** (idx / BUCKETS_PER_OCTAVE)
+    return lo, hi
+
+
+class DurationHistogram:
+    """Counts of durations in log-spaced buckets, plus count/sum/max."""
+
+    __slots__ = ("counts", "total", "sum", "max")
+
+    def __init__(self) -> None:
+        self.counts = array("I", bytes(4 * NUM_BUCKETS))
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.counts[bucket_index(seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Approximate the *q*-th percentile (0-100) in seconds."""
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(self.total * q / 100.0))
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                lo, hi = bucket_bounds(idx)
+                mid = math.sqrt(lo * hi) if lo else hi / 2
+                return min(mid, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else 0.0
+
+
+class CommandStats:
+    """Duration histograms per command, overall and per window.
+
+    Both maps are capacity-bounded; once full, new command names are folded
+    into a single OTHER histogram so memory stays fixed.
+    """
+
+    def __init__(self, max_commands: int = 256, max_window_commands: int = 32) -> None:
+        self.max_commands = max_commands
+        self.max_window_commands = max_window_commands
+        self.by_command: Dict[str, DurationHistogram] = {}
+        self.by_window: Dict[int, Dict[str, DurationHistogram]] = {}
+
+    @staticmethod
+    def _slot(table: Dict[str, DurationHistogram], command: str, limit: int) -> DurationHistogram:
+        hist = table.get(command)
+        if hist is None:
+            if len(table) >= limit:
+                command = OTHER
+                hist = table.get(command)
+            if hist is None:
+                hist = table[command] = DurationHistogram()
+        return hist
+
+    def record(self, window_id: int, command: str, seconds: float) -> None:
+        self._slot(self.by_command, command, self.max_commands).add(seconds)
+        per_window = self.by_window.setdefault(window_id, {})
+        self._slot(per_window, command, self.max_window_commands).add(seconds)
+
+    def forget_window(self, window_id: int) -> None:
+        self.by_window.pop(window_id, None)
+
+    def items(self) -> Iterator[Tuple[int, str, DurationHistogram]]:
+        for command, hist in self.by_command.items():
+            yield ALL_WINDOWS, command, hist
+        for window_id, table in self.by_window.items():
+            for command, hist in table.items():
+                yield window_id, command, hist
+
+    def dump(self, path: Path) -> None:
+        """Atomically write all histograms to *path* in a compact binary form."""
+        records = list(self.items())
+        chunks = [_HEADER.pack(_MAGIC, len(records))]
+        for window_id, command, hist in records:
+            key = command.encode("utf-8")[:0xFFFF]
+            buckets = [(i, c) for i, c in enumerate(hist.counts) if c]
+            chunks.append(_RECORD.pack(window_id, len(key), hist.total, hist.sum, hist.max, len(buckets)))
+            chunks.append(key)
+            chunks.extend(_BUCKET.pack(i, c) for i, c in buckets)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(b"".join(chunks))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["CommandStats"]:
+        try:
+            data = path.read_bytes()
+            magic, count = _HEADER.unpack_from(data, 0)
+        except (OSError, struct.error):
+            return None
+        if magic != _MAGIC:
+            return None
+        stats = cls(max_commands=1 << 30, max_window_commands=1 << 30)
+        offset = _HEADER.size
+        try:
+            for _ in range(count):
+                window_id, key_len, total, total_sum, total_max, nbuckets = _RECORD.unpack_from(data, offset)
+                offset += _RECORD.size
+                command = data[offset:offset + key_len].decode("utf-8", "replace")
+                offset += key_len
+                hist = DurationHistogram()
+                for _ in range(nbuckets):
+                    idx, c = _BUCKET.unpack_from(data, offset)
+                    offset += _BUCKET.size
+                    if idx < NUM_BUCKETS:
+                        hist.counts[idx] = c
+                hist.total, hist.sum, hist.max = total, total_sum, total_max
+                if window_id == ALL_WINDOWS:
+                    stats.by_command[command] = hist
+                else:
+                    stats.by_window.setdefault(window_id, {})[command] = hist
+        except struct.error:
+            pass
+        return stats
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 1:
+        return f"{seconds * 1000:.0f}ms"
+    if seconds < 120:
+        return f"{seconds:.1f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def format_table(table: Dict[str, DurationHistogram], limit: int = 30) -> list[str]:
+    """Render one histogram table sorted by total time spent, largest first."""
+    rows = sorted(table.items(), key=lambda kv: -kv[1].sum)[:limit]
+    lines = [f"  {'command':<24} {'runs':>6} {'total':>8} {'p50':>8} {'p95':>8} {'p99':>8}"]
+    for command, hist in rows:
+        lines.append(
+            f"  {command[:24]:<24} {hist.total:>6} {format_duration(hist.sum):>8}"
+            f" {format_duration(hist.percentile(50)):>8}"
+            f" {format_duration(hist.percentile(95)):>8}"
+            f" {format_duration(hist.percentile(99)):>8}"
+        )
+    return lines
@@ -1,110 +1,100 @@
 #!/usr/bin/env python3
-"""Compact help overlay for Kitty."""
+"""Compact help overlay for Kitty.
+
+The help text is generated from the keymap configuration by help_index
+(cached under ~/.cache until a config file changes). ``/`` searches as you
+type through help_index's inverted token index, jumping to the first
+match; n/N step through the matches afterwards.
+"""
 
 from __future__ import annotations
 
 import curses
+from typing import List
+
+from help_index import ENTRY, HelpSearch, load_help
+from list_view import BLANK, CANCEL, ESC, Line, ListView, text_line
 
-HELP_TEXT = """
-WINDOW / TAB BASICS
-- New tab:             Ctrl+Shift+Enter
-- New window:          Ctrl+Shift+N
-- Horizontal split:    Ctrl+Shift+Alt+-
-- Vertical split:      Ctrl+Shift+Alt+\
-- Cycle windows:       Ctrl+Shift+[ / ]
-- Cycle tabs:          Ctrl+Shift+Left / Right
-- Toggle fullscreen:   Ctrl+Shift+F11
-- Toggle maximize:     Ctrl+Shift+F10
-
-NAVIGATION & HISTORY
-- Scrollback viewer:   Ctrl+Shift+H
-- Scroll to prompt:    Ctrl+Shift+Alt+Z / X
-- Command output:      Right click selects entire command, F1 reopens it
-- Broadcast input:      Ctrl+Shift+B (match current tab panes)
-
-CONFIG & TOOLING
-- Edit config:         Ctrl+Shift+F2
-- Reload config:       Ctrl+Shift+F5
-- Debug config:        Ctrl+Alt+F11
-- Command palette:     Ctrl+Shift+P, C
-- Help overlay:        Ctrl+Shift+F9 (this view)
-
-PROFILES & TOGGLES (Ctrl+Shift+P, …)
-- B: Battery saver        - writes local/battery.conf
-- F: Font autoscale       - writes local/font-scale.conf
-- T: Toggle tmux prefix   - writes local/tmux-prefix.conf
-- W: Watch & auto reload  - toggles watch-reload.sh
-- U: Transfer (download)  - `kitty @ remote-transfer` via helper
-- Y: Transfer (upload)    - `kitty @ remote-transfer --direction=upload`
-- M: Status panel         - htop panel via kitty +kitten panel
-- H: SSH host picker      - wrapper around kitten ssh
-
-SCRIPTS & PATHS
-- Config root:        ~/.config/kitty
-- Includes:           ~/.config/kitty/includes/*.conf
-- Scripts:            ~/.config/kitty/scripts/
-- Sessions:           ~/.config/kitty/sessions/
-- Local overrides:    ~/.config/kitty/local/
-
-TROUBLESHOOTING
-- Minimal config:     kitty --config ~/.config/kitty/kitty-minimal.conf
-- GPU-safe launcher:  ~/.config/kitty/run-kitty-safe.sh
-- RC socket issues:   ensure ui.conf exports KITTY_LISTEN_ON
-- File watch:         scripts/watch-reload.sh (requires inotifywait)
-"""
+
+def next_match(matches: List[int], current: int, step: int) -> int:
+    """The match after (step=1) or before (step=-1) *current*, wrapping."""
+    if step > 0:
+        later = [m for m in matches if m > current]
+        return later[0] if later else matches[0]
+    earlier = [m for m in matches if m < current]
+    return earlier[-1] if earlier else matches[-1]
 
 
 def viewer(stdscr):
     curses.curs_set(0)
     stdscr.nodelay(False)
-    stdscr.keypad(True)
-
-    lines = HELP_TEXT.strip("\n").splitlines()
-    top = 0
-    cur = 0
-    search = ""
-    matches = []
-
-    def redraw() -> None:
-        stdscr.clear()
-        h, w = stdscr.getmaxyx()
-        stdscr.addnstr(0, 0, "Kitty Help — arrows to scroll | / to search | q to close", w-1, curses.A_BOLD)
-        for idx in range(1, h):
-            line_idx = top + idx - 1
-            if line_idx >= len(lines):
-                break
-            attr = curses.A_REVERSE if line_idx == cur else curses.A_NORMAL
-            stdscr.addnstr(idx, 0, lines[line_idx], w-1, attr)
-        stdscr.refresh()
-
-    redraw()
+
+    lines = load_help()
+    search = HelpSearch(lines)
+    view = ListView(stdscr)
+    title = text_line("Kitty Help — arrows to scroll | / to search | n/N next/prev match | q to close", curses.A_BOLD)
+    query = ""
+    matches: List[int] = []
+    matched: set = set()
+    # Where the selection was when the search started
+    anchor = 0
+
+    def row(idx: int, selected: bool, width: int) -> Line:
+        line = lines[idx]
+        attr = curses.A_NORMAL if line.kind == ENTRY or not line.text.strip() else curses.A_BOLD
+        if idx in matched:
+            attr |= curses.A_UNDERLINE
+        if selected:
+            attr |= curses.A_REVERSE
+        return text_line(line.text, attr)
 
     while True:
+        if query and not matches:
+            status = text_line(f"No match for {query!r}", curses.A_DIM)
+        elif matches:
+            position = sum(1 for m in matches if m <= view.selected)
+            status = text_line(f"{query!r}: match {max(1, position)}/{len(matches)} — n/N to move", curses.A_DIM)
+        else:
+            status = BLANK
+        footer = text_line(f"/{query}   {len(matches)} matches" if query else "/") if view.typing else status
+        view.render((title,), len(lines), row, footer=(footer,))
+
         ch = stdscr.getch()
-        if ch in (ord('q'), 27):
+        if view.typing:
+            if ch == ESC:
+                view.typing = False
+                query, matches, matched = "", [], set()
+                view.selected = anchor
+                continue
+            elif ch in (curses.KEY_ENTER, 10, 13):
+                view.typing = False
+                continue
+            elif ch in (curses.KEY_BACKSPACE, 127, 8):
+                query = query[:-1]
+            elif 32 <= ch <= 126:
+                query += chr(ch)
+            else:
+                continue
+            # Incremental: every keystroke re-queries the index
+            matches = search.search(query) if query.strip() else []
+            matched = set(matches)
+            view.selected = next_match(matches, anchor - 1, 1) if matches else anchor
+            continue
+
+        action = view.handle(ch, len(lines))
+        if action == CANCEL:
             return
-        elif ch in (curses.KEY_DOWN, ord('j')):
-            cur = min(len(lines) - 1, cur + 1)
-        elif ch in (curses.KEY_UP, ord('k')):
-            cur = max(0, cur - 1)
-        elif ch in (curses.KEY_NPAGE, ord(' ')):
-            cur = min(len(lines) - 1, cur + 10)
-        elif ch in (curses.KEY_PPAGE, ord('b')):
-            cur = max(0, cur - 10)
-        elif ch == ord('/'):
-            curses.echo()
-            stdscr.addstr(curses.LINES - 1, 0, "/")
-            query = stdscr.getstr().decode()
-            curses.noecho()
-            if query:
-                matches[:] = [i for i, line in enumerate(lines) if query.lower() in line.lower()]
-                if matches:
-                    cur = matches[0]
-        if cur < top:
-            top = cur
-        elif cur >= top + curses.LINES - 1:
-            top = cur - curses.LINES + 2
-        redraw()
+        elif action is None:
+            if ch == ord(' '):
+                view.handle(curses.KEY_NPAGE, len(lines))
+            elif ch == ord('b'):
+                view.handle(curses.KEY_PPAGE, len(lines))
+            elif ch == ord('/'):
+                view.typing = True
+                query, matches, matched = "", [], set()
+                anchor = view.selected
+            elif ch in (ord('n'), ord('N')) and matches:
+                view.selected = next_match(matches, view.selected, 1 if ch == ord('n') else -1)
 
 
 def main():
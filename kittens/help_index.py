@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""Help text generated from the live keymap configuration.
+
+Starting at kitty.conf, every ``include``/``globinclude`` is followed and
+each ``map``/``mouse_map`` line becomes a help entry under the comment
+heading it sits below (the first line of a comment block that follows a
+blank line and leads into a binding), with the comment line right above it
+as a note. The rendered lines are cached in ~/.cache/kitty/help-index.json
+together with the mtimes of every file (and glob directory) read, so
+help_center opens without parsing anything until the configuration changes.
+
+HelpSearch is an inverted index (token -> line numbers) over the rendered
+lines with prefix lookups, so as-you-type search never scans the text.
+
+Standalone, prints the generated help:
+
+  python3 help_index.py [query]
+"""
+from __future__ import annotations
+
+import glob
+import json
+import os
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from action_index import map_label, parse_map_line, tokens
+
+HOME = Path.home()
+CFG = HOME / ".config" / "kitty"
+INDEX_FILE = HOME / ".cache" / "kitty" / "help-index.json"
+INDEX_VERSION = 2
+
+# Line kinds
+TITLE = "title"
+SECTION = "section"
+ENTRY = "entry"
+TEXT = "text"
+
+# Not derivable from the keymaps
+STATIC_SECTIONS = """
+SCRIPTS & PATHS
+- Config root:        ~/.config/kitty
+- Includes:           ~/.config/kitty/includes/*.conf
+- Scripts:            ~/.config/kitty/scripts/
+- Sessions:           ~/.config/kitty/sessions/
+- Local overrides:    ~/.config/kitty/local/
+
+TROUBLESHOOTING
+- Minimal config:     kitty --config ~/.config/kitty/kitty-minimal.conf
+- GPU-safe launcher:  ~/.config/kitty/run-kitty-safe.sh
+- RC socket issues:   ensure ui.conf exports KITTY_LISTEN_ON
+- File watch:         scripts/watch-reload.sh (requires inotifywait)
+"""
+
+KEY_COLUMN = 30
+
+
+class HelpLine(NamedTuple):
+    text: str
+    kind: str
+
+
+class Binding(NamedTuple):
+    file: str
+    section: str
+    keys: str
+    label: str
+    note: str
+
+
+Stamp = List[Tuple[str, float]]
+
+
+def format_key(part: str) -> str:
+    if len(part) == 1 or (part[0] in "fF" and part[1:].isdigit()):
+        return part.upper()
+    return part.capitalize()
+
+
+def format_keys(keys: str, kitty_mod: str) -> str:
+    """kitty_mod+p>c -> Ctrl+Shift+P > C."""
+    chords = keys.replace("kitty_mod", kitty_mod).split(">")
+    return " > ".join("+".join(format_key(part) for part in chord.split("+")) for chord in chords)
+
+
+def is_map(line: str) -> bool:
+    return line.startswith("map ") or line.startswith("mouse_map ")
+
+
+class ConfigReader:
+    """Walks kitty.conf and its includes, collecting bindings in order."""
+
+    def __init__(self, config_dir: Path = CFG) -> None:
+        self.config_dir = config_dir
+        self.kitty_mod = "ctrl+shift"
+        self.bindings: List[Binding] = []
+        self.stamp: Stamp = []
+        self._seen: set = set()
+
+    def _touch(self, path: str) -> Optional[float]:
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+        self.stamp.append((path, mtime))
+        return mtime
+
+    def read(self, path: Path) -> None:
+        path_str = os.fspath(path)
+        if path_str in self._seen or self._touch(path_str) is None:
+            return
+        self._seen.add(path_str)
+        try:
+            lines = path.read_text(errors="replace").splitlines()
+        except OSError:
+            return
+        name = os.path.relpath(path_str, self.config_dir)
+        section = ""
+        comments: List[str] = []
+        after_blank = True
+        for raw in lines:
+            line = raw.strip()
+            if not line:
+                comments = []
+                after_blank = True
+                continue
+            if line.startswith("#"):
+                text = line.lstrip("#").strip()
+                # Commented-out bindings are not documentation
+                if text and not is_map(text):
+                    comments.append(text)
+                continue
+            # A comment block opens a section only when it starts after a
+            # blank line and leads straight into a binding
+            if comments and after_blank and is_map(line):
+                section, comments = comments[0], comments[1:]
+            # Only the comment right above a binding describes it
+            note = comments[-1] if comments else ""
+            comments = []
+            after_blank = False
+            key, _, value = line.partition(" ")
+            if key in ("include", "globinclude"):
+                self._include(path.parent, value.strip(), key == "globinclude")
+            elif key == "kitty_mod":
+                self.kitty_mod = value.strip() or self.kitty_mod
+            elif key == "map":
+                parsed = parse_map_line(line)
+                if parsed:
+                    self.bindings.append(Binding(name, section, parsed[0], map_label(parsed[1]), note))
+            elif key == "mouse_map":
+                parts = value.split(None, 3)
+                if len(parts) == 4:
+                    self.bindings.append(Binding(name, section, " ".join(parts[:3]), map_label(parts[3]), note))
+
+    def _include(self, base: Path, target: str, is_glob: bool) -> None:
+        pattern = os.path.expanduser(target)
+        if not os.path.isabs(pattern):
+            pattern = os.path.join(base, pattern)
+        if is_glob:
+            # A new file matching the glob changes the directory mtime
+            self._touch(os.path.dirname(pattern))
+            for match in sorted(glob.glob(pattern)):
+                self.read(Path(match))
+        else:
+            self.read(Path(pattern))
+
+
+def render(reader: ConfigReader) -> List[HelpLine]:
+    lines: List[HelpLine] = []
+    current: Tuple[str, str] = ("", "")
+    for binding in reader.bindings:
+        if (binding.file, binding.section) != current:
+            if binding.file != current[0]:
+                if lines:
+                    lines.append(HelpLine("", TEXT))
+                lines.append(HelpLine(f"KEYS — {binding.file}", TITLE))
+            elif lines:
+                lines.append(HelpLine("", TEXT))
+            if binding.section:
+                lines.append(HelpLine(binding.section.upper(), SECTION))
+            current = (binding.file, binding.section)
+        text = f"- {format_keys(binding.keys, reader.kitty_mod):<{KEY_COLUMN}} {binding.label}"
+        if binding.note:
+            text += f"  ({binding.note})"
+        lines.append(HelpLine(text, ENTRY))
+    for line in STATIC_SECTIONS.splitlines():
+        if line and not line.startswith("-"):
+            lines.append(HelpLine(line, SECTION))
+        else:
+            lines.append(HelpLine(line, TEXT))
+    return lines
+
+
+def stamp_valid(stamp: Stamp) -> bool:
+    for path, mtime in stamp:
+        try:
+            if os.stat(path).st_mtime != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def load_help(config_dir: Path = CFG, cache: Path = INDEX_FILE) -> List[HelpLine]:
+    """Generated help lines, re-parsed only when a config file changed."""
+    try:
+        data = json.loads(cache.read_text())
+        if data.get("version") == INDEX_VERSION and data.get("root") == os.fspath(config_dir):
+            stamp = [tuple(item) for item in data["stamp"]]
+            if stamp and stamp_valid(stamp):
+                return [HelpLine(*line) for line in data["lines"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    reader = ConfigReader(config_dir)
+    reader.read(config_dir / "kitty.conf")
+    lines = render(reader)
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_name(f".{cache.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({
+            "version": INDEX_VERSION, "root": os.fspath(config_dir),
+            "stamp": reader.stamp, "lines": [list(line) for line in lines],
+        }))
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+    return lines
+
+
+class HelpSearch:
+    """Inverted token index over help lines with prefix lookups.
+
+    A query matches the lines containing, for every query word, a token
+    that starts with it. The sorted vocabulary turns a word into a bisect
+    plus a union of posting sets; words and queries are cached, so typing
+    one more character costs a few set operations.
+    """
+
+    def __init__(self, lines: List[HelpLine]) -> None:
+        self.postings: Dict[str, set] = {}
+        for number, line in enumerate(lines):
+            for token in tokens(line.text):
+                self.postings.setdefault(token, set()).add(number)
+        self.vocabulary = sorted(self.postings)
+        self._words: Dict[str, frozenset] = {}
+        self._results: Dict[str, List[int]] = {"": []}
+
+    def _lookup(self, word: str) -> frozenset:
+        cached = self._words.get(word)
+        if cached is not None:
+            return cached
+        found: set = set()
+        vocabulary = self.vocabulary
+        pos = bisect_left(vocabulary, word)
+        while pos < len(vocabulary) and vocabulary[pos].startswith(word):
+            found |= self.postings[vocabulary[pos]]
+            pos += 1
+        result = self._words[word] = frozenset(found)
+        return result
+
+    def search(self, query: str) -> List[int]:
+        """Matching line numbers in order."""
+        words = tokens(query)
+        key = " ".join(words)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+        matches = frozenset.intersection(*(self._lookup(word) for word in words))
+        result = self._results[key] = sorted(matches)
+        return result
+
+
+if __name__ == "__main__":
+    import sys
+
+    help_lines = load_help()
+    query = " ".join(sys.argv[1:])
+    numbers = HelpSearch(help_lines).search(query) if query else range(len(help_lines))
+    for number in numbers:
+        print(help_lines[number].text)
@@ -15,6 +15,8 @@ from typing import Optional
 
 from kitty.boss import Boss
 
+from list_view import ACCEPT, BLANK, CANCEL, Line, ListView, text_line
+
 # Layout definitions
 LAYOUTS = {
     "Single": {
@@ -67,55 +69,32 @@ def picker_ui(stdscr):
     """Interactive layout picker UI."""
     curses.curs_set(0)
     stdscr.nodelay(False)
-    stdscr.keypad(True)
 
     layouts = list(LAYOUTS.keys())
-    selected_idx = 0
-
-    while True:
-        stdscr.clear()
-        h, w = stdscr.getmaxyx()
-
-        # Header
-        stdscr.addnstr(
-            0, 0,
-            "Layout Presets — Arrow keys: navigate | Enter: apply | Esc/q: cancel",
-            w - 1,
-            curses.A_BOLD,
+    view = ListView(stdscr)
+    header = (
+        text_line("Layout Presets — Arrow keys: navigate | Enter: apply | Esc/q: cancel", curses.A_BOLD),
+        BLANK,
+    )
+
+    def row(idx: int, selected: bool, width: int) -> Line:
+        name = layouts[idx]
+        # Highlight selected
+        attr = curses.A_REVERSE if selected else curses.A_NORMAL
+        return (
+            (2, name, attr | curses.A_BOLD),
+            (20, LAYOUTS[name]["desc"], attr | curses.A_DIM),
         )
 
-        # Layout list
-        for idx, name in enumerate(layouts):
-            y_pos = 2 + idx * 2
-            if y_pos >= h - 1:
-                break
-
-            layout_info = LAYOUTS[name]
-            desc = layout_info["desc"]
-
-            # Highlight selected
-            attr = curses.A_REVERSE if idx == selected_idx else curses.A_NORMAL
-
-            stdscr.addnstr(y_pos, 2, f"{name}", w - 3, attr | curses.A_BOLD)
-            stdscr.addnstr(y_pos + 1, 4, desc, w - 5, attr | curses.A_DIM)
-
-        stdscr.refresh()
+    while True:
+        view.render(header, len(layouts), row)
 
         # Handle input
-        ch = stdscr.getch()
-
-        if ch in (ord("q"), 27):  # q or Esc
+        action = view.handle(stdscr.getch(), len(layouts))
+        if action == CANCEL:
             return None
-        elif ch in (curses.KEY_ENTER, 10, 13):  # Enter
-            return layouts[selected_idx]
-        elif ch in (curses.KEY_UP, ord("k")):
-            selected_idx = max(0, selected_idx - 1)
-        elif ch in (curses.KEY_DOWN, ord("j")):
-            selected_idx = min(len(layouts) - 1, selected_idx + 1)
-        elif ch in (curses.KEY_HOME,):
-            selected_idx = 0
-        elif ch in (curses.KEY_END,):
-            selected_idx = len(layouts) - 1
+        elif action == ACCEPT:
+            return layouts[view.selected]
 
 
 def main(args: list[str]) -> str:
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Differential, virtualized list rendering shared by the picker kittens.
+
+The kittens describe each frame as header lines, a row callback and footer
+lines. ListView only asks for the rows that are on screen, remembers what
+every screen row last showed, rewrites just the rows that changed and
+flushes them with a single ``doupdate``. Nothing calls ``clear()``, so
+moving the selection repaints two rows instead of the whole screen.
+
+Keys (the same in every picker):
+  Up/Down, Ctrl+P/Ctrl+N   move (also k/j when not typing)
+  PgUp/PgDn                move a page
+  Home/End                 first/last (also g/G when not typing)
+  Enter                    accept
+  Esc                      cancel (also q when not typing)
+"""
+from __future__ import annotations
+
+import curses
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+# One screen line: (column, text, attr) segments; a negative column counts
+# from the right edge.
+Segment = Tuple[int, str, int]
+Line = Tuple[Segment, ...]
+
+BLANK: Line = ()
+
+CTRL_N = 14
+CTRL_P = 16
+ESC = 27
+
+ACCEPT = "accept"
+CANCEL = "cancel"
+MOVED = "moved"
+
+
+def text_line(text: str, attr: int = curses.A_NORMAL, col: int = 0) -> Line:
+    return ((col, text, attr),)
+
+
+class ListView:
+    """Selection, scrolling and differential drawing for one list."""
+
+    def __init__(self, stdscr, typing: bool = False) -> None:
+        self.stdscr = stdscr
+        # While typing, letters belong to the query, not to navigation
+        self.typing = typing
+        self.selected = 0
+        self.top = 0
+        self.height = 1
+        self._shown: Dict[int, Line] = {}
+        stdscr.keypad(True)
+
+    def invalidate(self) -> None:
+        """Forget what is on screen (after a resize or a foreign write)."""
+        self._shown.clear()
+        self.stdscr.erase()
+
+    def _draw_line(self, y: int, line: Line, width: int) -> None:
+        if self._shown.get(y) == line:
+            return
+        self.stdscr.move(y, 0)
+        self.stdscr.clrtoeol()
+        for col, text, attr in line:
+            x = width + col if col < 0 else col
+            if 0 <= x < width and text:
+                try:
+                    self.stdscr.addnstr(y, x, text, width - x, attr)
+                except curses.error:
+                    pass
+        self._shown[y] = line
+
+    def render(
+        self,
+        header: Sequence[Line],
+        count: int,
+        row: Callable[[int, bool, int], Line],
+        footer: Sequence[Line] = (),
+        empty: Line = BLANK,
+        cursor: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        """Draw one frame; *row(index, selected, width)* is called only for visible rows."""
+        h, w = self.stdscr.getmaxyx()
+        width = w - 1
+        self.height = max(1, h - len(header) - len(footer))
+
+        self.selected = max(0, min(self.selected, count - 1))
+        if self.selected < self.top:
+            self.top = self.selected
+        elif self.selected >= self.top + self.height:
+            self.top = self.selected - self.height + 1
+        self.top = max(0, min(self.top, count - self.height))
+
+        y = 0
+        for line in header:
+            self._draw_line(y, line, width)
+            y += 1
+        for pos in range(self.top, self.top + self.height):
+            if pos < count:
+                line = row(pos, pos == self.selected, width)
+            else:
+                line = empty if pos == 0 else BLANK
+            self._draw_line(y, line, width)
+            y += 1
+        for line in footer:
+            self._draw_line(y, line, width)
+            y += 1
+        for stale in [key for key in self._shown if key >= h]:
+            del self._shown[stale]
+
+        if cursor is not None:
+            self.stdscr.move(min(cursor[0], h - 1), min(cursor[1], width))
+        self.stdscr.noutrefresh()
+        curses.doupdate()
+
+    def handle(self, ch: int, count: int) -> Optional[str]:
+        """Apply a navigation key; ACCEPT, CANCEL, MOVED, or None if not ours."""
+        typing = self.typing
+        if ch in (curses.KEY_ENTER, 10, 13):
+            return ACCEPT
+        if ch == ESC or (ch == ord("q") and not typing):
+            return CANCEL
+        if ch == curses.KEY_RESIZE:
+            self.invalidate()
+            return MOVED
+        last = max(0, count - 1)
+        if ch in (curses.KEY_UP, CTRL_P) or (ch == ord("k") and not typing):
+            self.selected = max(0, self.selected - 1)
+        elif ch in (curses.KEY_DOWN, CTRL_N) or (ch == ord("j") and not typing):
+            self.selected = min(last, self.selected + 1)
+        elif ch == curses.KEY_PPAGE:
+            self.selected = max(0, self.selected - self.height)
+        elif ch == curses.KEY_NPAGE:
+            self.selected = min(last, self.selected + self.height)
+        elif ch == curses.KEY_HOME or (ch == ord("g") and not typing):
+            self.selected = 0
+        elif ch == curses.KEY_END or (ch == ord("G") and not typing):
+            self.selected = last
+        else:
+            return None
+        return MOVED
@@ -23,12 +23,10 @@ import subprocess
 import sys
 import time
 
+from rc_client import rc
 
-def rc(*args: str) -> None:
-    try:
-        subprocess.run(["kitty", "@", *args], check=False)
-    except Exception:
-        pass
+# Tab of the window this wrapper runs in (the socket has no "self" window)
+TAB_MATCH = f"window_id:{os.environ['KITTY_WINDOW_ID']}" if os.environ.get("KITTY_WINDOW_ID") else None
 
 
 def send_notification(title: str, message: str, urgency: str = "normal") -> None:
@@ -73,7 +71,7 @@ def main(argv: list[str]) -> int:
             elapsed = time.time() - start
             if not shown and elapsed >= threshold:
                 # Mark tab by prefixing title (best-effort)
-                rc("set-tab-title", title_prefix + "Long task")
+                rc("set-tab-title", title=title_prefix + "Long task", match=TAB_MATCH)
                 shown = True
             time.sleep(0.2)
     finally:
@@ -81,7 +79,7 @@ def main(argv: list[str]) -> int:
     elapsed = time.time() - start
     # Clear title marker and ring bell for attention
     if shown:
-        rc("set-tab-title", "")
+        rc("set-tab-title", title="", match=TAB_MATCH)
 
     # Determine task status
     success = proc.returncode == 0
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Shared remote-control client for kittens and scripts.
+
+Speaks kitty's remote-control wire protocol (``ESC P @kitty-cmd <json> ESC \\``)
+directly over the socket from ``KITTY_LISTEN_ON``, so each command is one
+round-trip on a pooled, persistent connection instead of a fork/exec of
+``kitty @``. Several commands can be pipelined in one write with ``batch``.
+
+Usage:
+  from rc_client import rc
+  rc("set-tab-title", title="build", match="id:3")
+  client().batch([("set-tab-title", {...}), ("set-tab-title", {...})])
+
+Scripts outside kittens/ put this directory on ``sys.path`` first.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import socket
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_SOCKET = f"unix:{Path.home()}/.cache/kitty/kitty-{os.environ.get('USER', '')}.sock"
+# Protocol version we claim to speak; matches the minimum kitty the config targets
+RC_VERSION = (0, 42, 2)
+DEFAULT_TIMEOUT = 2.0
+
+Command = Tuple[str, Optional[Dict[str, Any]]]
+
+
+class RemoteControl:
+    """Persistent client for one kitty remote-control socket.
+
+    Reconnects transparently if kitty closed the connection between
+    commands. Every request has its own timeout.
+    """
+
+    PREFIX = b"\x1bP@kitty-cmd"
+    SUFFIX = b"\x1b\\"
+
+    def __init__(self, address: str, timeout: float = DEFAULT_TIMEOUT) -> None:
+        self.address = address
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._buf = b""
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            kind, _, where = self.address.partition(":")
+            if kind == "unix":
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                target: Any = "\0" + where[1:] if where.startswith("@") else where
+            elif kind == "tcp":
+                host, _, port = where.rpartition(":")
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                target = (host, int(port))
+            else:
+                raise OSError(f"unsupported remote control address: {self.address}")
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(target)
+            except OSError:
+                sock.close()
+                raise
+            self._sock, self._buf = sock, b""
+        return self._sock
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def encode(self, cmd: str, payload: Optional[Dict[str, Any]] = None, no_response: bool = False) -> bytes:
+        msg: Dict[str, Any] = {"cmd": cmd, "version": list(RC_VERSION), "no_response": no_response}
+        if payload:
+            msg["payload"] = {k: v for k, v in payload.items() if v is not None}
+        return self.PREFIX + json.dumps(msg).encode("utf-8") + self.SUFFIX
+
+    def _read_response(self, sock: socket.socket, timeout: float) -> Dict[str, Any]:
+        sock.settimeout(timeout)
+        while self.SUFFIX not in self._buf:
+            chunk = sock.recv(65536)
+            if not chunk:
+                raise ConnectionResetError("kitty closed the remote control connection")
+            self._buf += chunk
+        frame, _, self._buf = self._buf.partition(self.SUFFIX)
+        start = frame.find(self.PREFIX)
+        return json.loads(frame[start + len(self.PREFIX):] if start >= 0 else frame)
+
+    def command(
+        self,
+        cmd: str,
+        payload: Optional[Dict[str, Any]] = None,
+        no_response: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Send one command; return kitty's response dict (None if not wanted)."""
+        data = self.encode(cmd, payload, no_response)
+        for attempt in (0, 1):
+            try:
+                sock = self._connect()
+                sock.sendall(data)
+                if no_response:
+                    return None
+                return self._read_response(sock, timeout or self.timeout)
+            except socket.timeout:
+                # Don't resend: kitty may still execute the command
+                self.close()
+                raise
+            except ConnectionError:
+                self.close()
+                if attempt:
+                    raise
+        return None
+
+    def batch(self, commands: Sequence[Command], timeout: Optional[float] = None) -> List[Optional[Dict[str, Any]]]:
+        """Pipeline *commands* in one write and collect their responses in order.
+
+        If kitty drops the connection part-way through, the commands it did
+        not answer are re-sent one at a time on fresh connections. On a
+        timeout the unanswered commands are left as None.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(commands)
+        if not commands:
+            return results
+        done = 0
+        try:
+            sock = self._connect()
+            sock.sendall(b"".join(self.encode(cmd, payload) for cmd, payload in commands))
+            for done in range(len(commands)):
+                results[done] = self._read_response(sock, timeout or self.timeout)
+            return results
+        except socket.timeout:
+            self.close()
+            return results
+        except ConnectionError:
+            self.close()
+        for i in range(done, len(commands)):
+            cmd, payload = commands[i]
+            results[i] = self.command(cmd, payload, timeout=timeout)
+        return results
+
+
+_POOL: Dict[str, RemoteControl] = {}
+
+
+def socket_address() -> str:
+    return os.environ.get("KITTY_LISTEN_ON") or DEFAULT_SOCKET
+
+
+def client(address: Optional[str] = None) -> RemoteControl:
+    """Pooled client for *address* (default: ``KITTY_LISTEN_ON``)."""
+    address = address or socket_address()
+    conn = _POOL.get(address)
+    if conn is None:
+        conn = _POOL[address] = RemoteControl(address)
+    return conn
+
+
+@atexit.register
+def _close_pool() -> None:
+    for conn in _POOL.values():
+        conn.close()
+
+
+def rc(cmd: str, **payload: Any) -> Optional[Dict[str, Any]]:
+    """Best-effort command on the pooled client.
+
+    Returns kitty's response (``{"ok": ..., "data": ...}``), or None when
+    kitty is unreachable or times out.
+    """
+    try:
+        return client().command(cmd, payload)
+    except (OSError, ValueError):
+        return None
+
+
+def ok(response: Optional[Dict[str, Any]]) -> bool:
+    return bool(response and response.get("ok"))
+
+
+def ls(**payload: Any) -> Optional[list]:
+    """Parsed ``ls`` output (list of OS windows), or None."""
+    response = rc("ls", **payload)
+    if not ok(response):
+        return None
+    data = response.get("data")
+    if isinstance(data, str):
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            return None
+    return data
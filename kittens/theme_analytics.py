@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Vectorized palette analytics across the theme library.
+
+Every theme's palette from the theme index is loaded into one
+(themes × slots × RGB) NumPy array, and WCAG relative luminance, contrast
+ratios and color distances are computed for the whole library in a few
+array passes, fast enough to redo on every picker open. theme_picker uses
+the metrics to sort and to filter with queries such as ``contrast>=7``.
+
+NumPy is optional: without it ``available()`` is False and the picker
+simply offers no metrics.
+
+Standalone, prints the metrics for every indexed theme:
+
+  python3 theme_analytics.py [metric]
+"""
+from __future__ import annotations
+
+import math
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from theme_index import COLOR_SLOTS, NO_COLOR, SLOT_INDEX, ThemeEntry
+
+try:
+    import numpy as np
+except ImportError:  # analytics are an optional extra
+    np = None
+
+# name -> description; every metric is "higher is more of it"
+METRICS: Dict[str, str] = {
+    "contrast": "foreground/background WCAG contrast ratio",
+    "ansi": "lowest contrast of color1-7/color9-15 against the background",
+    "cursor": "cursor/background WCAG contrast ratio",
+    "selection": "selection foreground/background WCAG contrast ratio",
+    "luminance": "background relative luminance (0 = black, 1 = white)",
+    "distinct": "smallest perceptual distance between color1-6 (0-765)",
+}
+
+_FG = SLOT_INDEX["foreground"]
+_BG = SLOT_INDEX["background"]
+_CURSOR = SLOT_INDEX["cursor"]
+_SEL_FG = SLOT_INDEX["selection_foreground"]
+_SEL_BG = SLOT_INDEX["selection_background"]
+_ANSI = [SLOT_INDEX[f"color{i}"] for i in (*range(1, 8), *range(9, 16))]
+_HUES = [SLOT_INDEX[f"color{i}"] for i in range(1, 7)]
+
+Filter = Tuple[str, str, float]
+_FILTER_RE = re.compile(r"^([a-z_]+)(>=|<=|>|<|=)(\d+(?:\.\d*)?|\.\d+)$")
+_OPS = {
+    ">=": lambda values, x: values >= x,
+    "<=": lambda values, x: values <= x,
+    ">": lambda values, x: values > x,
+    "<": lambda values, x: values < x,
+    "=": lambda values, x: np.abs(values - x) < 0.05,
+}
+
+
+def available() -> bool:
+    return np is not None
+
+
+def unpack_rgb(packed):
+    """(…) uint32 0xRRGGBB -> (…, 3) floats in 0-1; NO_COLOR becomes NaN."""
+    rgb = np.stack(((packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF), axis=-1) / 255.0
+    rgb[packed == NO_COLOR] = np.nan
+    return rgb
+
+
+def relative_luminance(rgb):
+    """WCAG 2 relative luminance of (…, 3) sRGB values."""
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    return linear @ np.array([0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(lum_a, lum_b):
+    return (np.maximum(lum_a, lum_b) + 0.05) / (np.minimum(lum_a, lum_b) + 0.05)
+
+
+def redmean_distance(rgb_a, rgb_b):
+    """Low-cost perceptual RGB distance ("redmean"), in 0-255 units."""
+    a = rgb_a * 255.0
+    b = rgb_b * 255.0
+    rmean = (a[..., 0] + b[..., 0]) / 2
+    d = a - b
+    return np.sqrt(
+        (2 + rmean / 256) * d[..., 0] ** 2
+        + 4 * d[..., 1] ** 2
+        + (2 + (255 - rmean) / 256) * d[..., 2] ** 2
+    )
+
+
+class PaletteAnalytics:
+    """Metrics for a list of themes, one array per metric (theme order)."""
+
+    def __init__(self, themes: Sequence[ThemeEntry]) -> None:
+        self.names = [theme.name for theme in themes]
+        self.position = {name: i for i, name in enumerate(self.names)}
+        packed = np.array([theme.colors for theme in themes], dtype=np.uint32).reshape(len(themes), len(COLOR_SLOTS))
+        self.rgb = unpack_rgb(packed)
+        self.luminance = relative_luminance(self.rgb)
+        self.metrics = self._compute()
+
+    def _compute(self) -> Dict[str, "np.ndarray"]:
+        lum = self.luminance
+        bg = lum[:, _BG]
+        hues = self.rgb[:, _HUES, :]
+        pairs = redmean_distance(hues[:, :, None, :], hues[:, None, :, :])
+        # Ignore each color's distance to itself
+        pairs[:, np.arange(len(_HUES)), np.arange(len(_HUES))] = np.inf
+        distinct = np.fmin.reduce(pairs.reshape(len(pairs), -1), axis=1) if len(pairs) else np.empty(0)
+        distinct[np.isinf(distinct)] = np.nan
+        return {
+            "contrast": contrast_ratio(lum[:, _FG], bg),
+            "ansi": np.fmin.reduce(contrast_ratio(lum[:, _ANSI], bg[:, None]), axis=1) if len(lum) else np.empty(0),
+            "cursor": contrast_ratio(lum[:, _CURSOR], bg),
+            "selection": contrast_ratio(lum[:, _SEL_FG], lum[:, _SEL_BG]),
+            "luminance": bg,
+            "distinct": distinct,
+        }
+
+    def value(self, metric: str, name: str) -> Optional[float]:
+        idx = self.position.get(name)
+        if idx is None:
+            return None
+        value = float(self.metrics[metric][idx])
+        return None if math.isnan(value) else value
+
+    def matching(self, filters: Sequence[Filter]) -> set[str]:
+        """Names of themes passing every filter (NaN never passes)."""
+        keep = np.ones(len(self.names), dtype=bool)
+        for metric, op, threshold in filters:
+            with np.errstate(invalid="ignore"):
+                keep &= _OPS[op](self.metrics[metric], threshold)
+        return {self.names[i] for i in np.flatnonzero(keep)}
+
+    def sort_key(self, metric: str):
+        """Key for sorting theme names by *metric*, highest first, unknown last."""
+        values = self.metrics[metric]
+        position = self.position
+
+        def key(name: str) -> float:
+            value = values[position[name]]
+            return math.inf if math.isnan(value) else -value
+
+        return key
+
+
+def parse_query(query: str) -> Tuple[str, List[Filter]]:
+    """Split a picker query into fuzzy text and metric filters.
+
+    Words containing <, > or = are filters (``contrast>=7``); ones that do
+    not parse yet (still being typed, unknown metric) are ignored.
+    """
+    words: List[str] = []
+    filters: List[Filter] = []
+    for word in query.split():
+        if not any(op in word for op in "<>="):
+            words.append(word)
+            continue
+        m = _FILTER_RE.match(word.lower())
+        if m and m.group(1) in METRICS:
+            filters.append((m.group(1), m.group(2), float(m.group(3))))
+    return " ".join(words), filters
+
+
+def format_metric(metric: str, value: Optional[float]) -> str:
+    if value is None:
+        return "—"
+    if metric == "luminance":
+        return f"{value:.2f}"
+    if metric == "distinct":
+        return f"{value:.0f}"
+    return f"{value:.1f}:1"
+
+
+if __name__ == "__main__":
+    import sys
+
+    from theme_index import load_index
+
+    if not available():
+        print("theme_analytics needs numpy (pip install numpy)")
+        raise SystemExit(1)
+    sort_by = sys.argv[1] if len(sys.argv) > 1 else "contrast"
+    if sort_by not in METRICS:
+        print(f"Unknown metric {sort_by!r}; choose from: {', '.join(METRICS)}")
+        raise SystemExit(1)
+    themes = load_index().themes
+    analytics = PaletteAnalytics(themes)
+    print(f"{'theme':<28}" + "".join(f"{metric:>11}" for metric in METRICS))
+    for name in sorted(analytics.names, key=analytics.sort_key(sort_by)):
+        print(f"{name[:28]:<28}" + "".join(f"{format_metric(m, analytics.value(m, name)):>11}" for m in METRICS))
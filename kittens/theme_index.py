@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Cached, pre-parsed index of the theme library.
+
+One small binary file under ~/.cache holds every theme's name, path, mtime
+and colors packed as 0xRRGGBB integers, plus the theme selected in
+current-theme.conf. Opening the index re-parses only theme files whose
+mtime changed since the last open (and drops deleted ones), so
+theme_picker's startup and any color-based preview or sort stay cheap with
+hundreds of themes installed.
+"""
+from __future__ import annotations
+
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+HOME = Path.home()
+THEMES_DIR = HOME / ".config" / "kitty" / "themes"
+INDEX_FILE = HOME / ".cache" / "kitty" / "theme-index.bin"
+CURRENT_THEME = "current-theme.conf"
+META_FILES = (CURRENT_THEME, "default-dark.conf")
+
+# Color settings captured per theme, in storage order
+COLOR_SLOTS: Tuple[str, ...] = (
+    "foreground", "background", "cursor", "cursor_text_color",
+    "selection_foreground", "selection_background", "url_color",
+    "active_border_color", "inactive_border_color",
+    "active_tab_foreground", "active_tab_background",
+    "inactive_tab_foreground", "inactive_tab_background", "tab_bar_background",
+) + tuple(f"color{i}" for i in range(16))
+SLOT_INDEX: Dict[str, int] = {name: i for i, name in enumerate(COLOR_SLOTS)}
+NO_COLOR = 0xFFFFFFFF
+
+_MAGIC = b"KTI1"
+# magic, slot count, theme count, current-theme.conf mtime, current name length
+_HEADER = struct.Struct("<4sHIdH")
+# mtime, name length, path length, colors
+_RECORD = struct.Struct(f"<dHH{len(COLOR_SLOTS)}I")
+
+
+class ThemeEntry(NamedTuple):
+    name: str
+    file: str
+    mtime: float
+    colors: Tuple[int, ...]
+
+    @property
+    def path(self) -> Path:
+        return Path(self.file)
+
+    def color(self, slot: str) -> Optional[int]:
+        value = self.colors[SLOT_INDEX[slot]]
+        return None if value == NO_COLOR else value
+
+
+@dataclass
+class ThemeIndex:
+    themes: List[ThemeEntry]
+    current: Optional[str]
+    current_mtime: float = 0.0
+
+    def get(self, name: str) -> Optional[ThemeEntry]:
+        for theme in self.themes:
+            if theme.name == name:
+                return theme
+        return None
+
+
+def parse_color(value: str) -> Optional[int]:
+    """#rgb / #rrggbb to 0xRRGGBB; anything else (names, 'none') is skipped."""
+    if not value.startswith("#"):
+        return None
+    digits = value[1:]
+    if len(digits) == 3:
+        digits = "".join(c * 2 for c in digits)
+    if len(digits) != 6:
+        return None
+    try:
+        return int(digits, 16)
+    except ValueError:
+        return None
+
+
+def parse_theme(path: Path) -> Tuple[int, ...]:
+    colors = [NO_COLOR] * len(COLOR_SLOTS)
+    try:
+        lines = path.read_text(errors="replace").splitlines()
+    except OSError:
+        return tuple(colors)
+    for line in lines:
+        parts = line.split(None, 2)
+        if len(parts) < 2:
+            continue
+        slot = SLOT_INDEX.get(parts[0])
+        if slot is not None:
+            value = parse_color(parts[1])
+            if value is not None:
+                colors[slot] = value
+    return tuple(colors)
+
+
+def parse_current(path: Path) -> Optional[str]:
+    """Theme name from the ``include <name>.conf`` line of current-theme.conf."""
+    try:
+        content = path.read_text()
+    except OSError:
+        return None
+    for line in content.splitlines():
+        line = line.strip()
+        if line.startswith("include ") and line.endswith(".conf"):
+            return line.split()[1][: -len(".conf")]
+    return None
+
+
+def read_index(cache: Path = INDEX_FILE) -> Optional[ThemeIndex]:
+    try:
+        data = cache.read_bytes()
+        magic, slots, count, current_mtime, name_len = _HEADER.unpack_from(data, 0)
+    except (OSError, struct.error):
+        return None
+    if magic != _MAGIC or slots != len(COLOR_SLOTS):
+        return None
+    offset = _HEADER.size
+    current = data[offset:offset + name_len].decode("utf-8", "replace") or None
+    offset += name_len
+    themes = []
+    try:
+        for _ in range(count):
+            record = _RECORD.unpack_from(data, offset)
+            offset += _RECORD.size
+            mtime, name_len, path_len = record[:3]
+            name = data[offset:offset + name_len].decode("utf-8", "replace")
+            offset += name_len
+            file = data[offset:offset + path_len].decode("utf-8", "surrogateescape")
+            offset += path_len
+            themes.append(ThemeEntry(name, file, mtime, record[3:]))
+    except struct.error:
+        return None
+    return ThemeIndex(themes, current, current_mtime)
+
+
+def write_index(index: ThemeIndex, cache: Path = INDEX_FILE) -> None:
+    current = (index.current or "").encode("utf-8")
+    chunks = [_HEADER.pack(_MAGIC, len(COLOR_SLOTS), len(index.themes), index.current_mtime, len(current)), current]
+    for theme in index.themes:
+        name = theme.name.encode("utf-8")
+        path = theme.file.encode("utf-8", "surrogateescape")
+        chunks.append(_RECORD.pack(theme.mtime, len(name), len(path), *theme.colors))
+        chunks.append(name)
+        chunks.append(path)
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache.with_name(f".{cache.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(b"".join(chunks))
+    os.replace(tmp, cache)
+
+
+def load_index(themes_dir: Path = THEMES_DIR, cache: Path = INDEX_FILE) -> ThemeIndex:
+    """Open the index, re-parsing only themes whose files changed."""
+    previous = read_index(cache)
+    known = {theme.name: theme for theme in previous.themes} if previous else {}
+    themes: List[ThemeEntry] = []
+    current_mtime = 0.0
+    changed = previous is None
+    try:
+        entries = list(os.scandir(themes_dir))
+    except OSError:
+        entries = []
+    for entry in entries:
+        if not entry.name.endswith(".conf"):
+            continue
+        try:
+            mtime = entry.stat().st_mtime
+        except OSError:
+            continue
+        if entry.name == CURRENT_THEME:
+            current_mtime = mtime
+            continue
+        if entry.name in META_FILES:
+            continue
+        name = entry.name[: -len(".conf")]
+        theme = known.get(name)
+        if theme is None or theme.mtime != mtime or theme.file != entry.path:
+            theme = ThemeEntry(name, entry.path, mtime, parse_theme(Path(entry.path)))
+            changed = True
+        themes.append(theme)
+    themes.sort(key=lambda theme: theme.name)
+    if previous is not None and len(themes) != len(previous.themes):
+        changed = True
+
+    if previous is not None and previous.current_mtime == current_mtime:
+        current = previous.current
+    else:
+        current = parse_current(themes_dir / CURRENT_THEME) if current_mtime else None
+        changed = True
+
+    index = ThemeIndex(themes, current, current_mtime)
+    if changed:
+        try:
+            write_index(index, cache)
+        except OSError:
+            pass
+    return index
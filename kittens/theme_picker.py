@@ -2,64 +2,85 @@
 """Interactive theme picker for Kitty terminal.
 
 Allows browsing and selecting from all available themes with fuzzy search.
+The selected theme is previewed live (one debounced set-colors call with its
+pre-parsed palette); Esc restores the original colors, and only Enter writes
+current-theme.conf and reloads the config.
+
+With NumPy installed, Tab cycles the sort between name and the palette
+metrics from theme_analytics, and words such as ``contrast>=7`` in the
+search filter on them.
 """
 from __future__ import annotations
 
 import curses
-import os
-import subprocess
+import time
 from pathlib import Path
 from typing import Optional
 
+from list_view import ACCEPT, BLANK, CANCEL, Line, ListView, text_line
+from rc_client import client, rc
+from theme_analytics import METRICS, PaletteAnalytics, available, format_metric, parse_query
+from theme_index import COLOR_SLOTS, NO_COLOR, ThemeEntry, ThemeIndex, load_index
+
 # Paths
 HOME = Path.home()
 THEMES_DIR = HOME / ".config" / "kitty" / "themes"
 CURRENT_THEME_FILE = THEMES_DIR / "current-theme.conf"
-
-
-def get_themes() -> list[tuple[str, Path]]:
-    """Get list of available theme files."""
-    if not THEMES_DIR.exists():
-        return []
-
-    themes = []
-    for theme_file in sorted(THEMES_DIR.glob("*.conf")):
-        # Skip meta files
-        if theme_file.name in ("current-theme.conf", "default-dark.conf"):
-            continue
-        themes.append((theme_file.stem, theme_file))
-
-    return themes
+# Selection must rest this long before its colors are pushed
+PREVIEW_DELAY = 0.12
+# Tab cycles through these; "name" keeps the fuzzy-match order
+SORT_ORDERS = ("name",) + tuple(METRICS)
+# kitty's built-in value for each slot a theme may leave out; None = "none"
+DEFAULT_COLORS: dict[str, Optional[int]] = {
+    "foreground": 0xDDDDDD, "background": 0x000000,
+    "cursor": 0xCCCCCC, "cursor_text_color": 0x111111,
+    "selection_foreground": 0x000000, "selection_background": 0xFFFACD,
+    "url_color": 0x0087BD,
+    "active_border_color": 0x00FF00, "inactive_border_color": 0xCCCCCC,
+    "active_tab_foreground": 0x000000, "active_tab_background": 0xEEEEEE,
+    "inactive_tab_foreground": 0x444444, "inactive_tab_background": 0x999999,
+    "tab_bar_background": None,
+    "color0": 0x000000, "color1": 0xCC0403, "color2": 0x19CB00, "color3": 0xCECB00,
+    "color4": 0x0D73CC, "color5": 0xCB1ED1, "color6": 0x0DCDCD, "color7": 0xDDDDDD,
+    "color8": 0x767676, "color9": 0xF2201F, "color10": 0x23FD00, "color11": 0xFFFD00,
+    "color12": 0x1A8FFF, "color13": 0xFD28FF, "color14": 0x14FFFF, "color15": 0xFFFFFF,
+}
+
+_INDEX: Optional[ThemeIndex] = None
+
+
+def theme_index() -> ThemeIndex:
+    """Theme index for this run, refreshed from the on-disk cache once."""
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = load_index(THEMES_DIR)
+    return _INDEX
+
+
+def get_themes() -> list[ThemeEntry]:
+    """Get list of available themes, sorted by name."""
+    return theme_index().themes
 
 
 def get_current_theme() -> Optional[str]:
     """Read currently active theme name."""
-    if not CURRENT_THEME_FILE.exists():
-        return None
+    return theme_index().current
 
-    try:
-        content = CURRENT_THEME_FILE.read_text()
-        for line in content.splitlines():
-            line = line.strip()
-            if line.startswith("include ") and line.endswith(".conf"):
-                # Extract theme name from "include themename.conf"
-                theme_file = line.split()[1]
-                return theme_file.replace(".conf", "")
-    except Exception:
-        pass
 
-    return None
+def char_mask(text: str) -> int:
+    """Bitmask of the characters in *text* (folded into 64 bits)."""
+    mask = 0
+    for char in text:
+        mask |= 1 << (ord(char) & 63)
+    return mask
 
 
-def match_score(query: str, theme_name: str) -> int:
-    """Calculate fuzzy match score for theme name."""
-    if not query:
-        return 1
-
-    query = query.lower()
-    name = theme_name.lower()
-    score = 0
+def fuzzy_score(query: str, name: str) -> int:
+    """Score lowercased *query* against lowercased *name*; 0 = no match.
 
+    Every query character has to appear in the name, in order, so a longer
+    query only ever matches a subset of what a shorter one matched.
+    """
     # Exact match
     if query == name:
         return 1000
@@ -70,21 +91,171 @@ def match_score(query: str, theme_name: str) -> int:
 
     # Contains whole query
     if query in name:
-        score += 100
+        return 100 + 10 * len(query)
 
-    # Individual character matches
+    # In-order characters, rewarding runs and word starts
+    score = 0
+    pos = 0
+    last = -2
     for char in query:
-        if char in name:
-            score += 10
-
+        found = name.find(char, pos)
+        if found < 0:
+            return 0
+        score += 10
+        if found == last + 1:
+            score += 5
+        if found == 0 or name[found - 1] in "_- ":
+            score += 5
+        last = found
+        pos = found + 1
     return score
 
 
+def match_score(query: str, theme_name: str) -> int:
+    """Calculate fuzzy match score for theme name."""
+    if not query:
+        return 1
+    return fuzzy_score(query.lower(), theme_name.lower())
+
+
+class ThemeMatcher:
+    """Incremental fuzzy filter over the theme list.
+
+    Lowercased names and character bitmasks are computed once; a theme whose
+    mask lacks any query character is rejected without scoring. A query
+    that extends a cached one only rescans that query's matches, and every
+    query's sorted result is cached, so navigation never re-scores.
+    """
+
+    def __init__(self, themes: list[ThemeEntry]) -> None:
+        self.themes = themes
+        self.lower = [theme.name.lower() for theme in themes]
+        self.masks = [char_mask(name) for name in self.lower]
+        self._matches: dict[str, list[int]] = {"": list(range(len(themes)))}
+        self._results: dict[str, list[ThemeEntry]] = {"": themes}
+
+    def filter(self, query: str) -> list[ThemeEntry]:
+        query = query.lower()
+        cached = self._results.get(query)
+        if cached is not None:
+            return cached
+
+        end = len(query) - 1
+        while query[:end] not in self._matches:
+            end -= 1
+        candidates = self._matches[query[:end]]
+
+        qmask = char_mask(query)
+        masks, lower = self.masks, self.lower
+        scored = []
+        for idx in candidates:
+            if qmask & ~masks[idx]:
+                continue
+            score = fuzzy_score(query, lower[idx])
+            if score:
+                scored.append((-score, self.themes[idx].name, idx))
+        scored.sort()
+        self._matches[query] = [idx for _, _, idx in scored]
+        result = self._results[query] = [self.themes[idx] for _, _, idx in scored]
+        return result
+
+
+class MetricView:
+    """Metric filters and sort order layered over ThemeMatcher results."""
+
+    def __init__(self, matcher: ThemeMatcher, analytics: Optional[PaletteAnalytics]) -> None:
+        self.matcher = matcher
+        self.analytics = analytics
+        self._results: dict[tuple[str, str], list[ThemeEntry]] = {}
+
+    def filter(self, query: str, sort: str = "name") -> list[ThemeEntry]:
+        if self.analytics is None:
+            return self.matcher.filter(query)
+        text, filters = parse_query(query)
+        key = (" ".join([text.lower()] + [f"{m}{op}{x}" for m, op, x in filters]), sort)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+        themes = self.matcher.filter(text)
+        if filters:
+            keep = self.analytics.matching(filters)
+            themes = [theme for theme in themes if theme.name in keep]
+        if sort != "name":
+            by_metric = self.analytics.sort_key(sort)
+            themes = sorted(themes, key=lambda theme: by_metric(theme.name))
+        self._results[key] = themes
+        return themes
+
+
+def push_colors(theme: ThemeEntry) -> None:
+    """Recolor every window with *theme*'s pre-parsed palette (no config reload).
+
+    Every slot is sent: one the theme leaves out gets kitty's default, so
+    nothing from a previous preview survives into this one or the revert.
+    """
+    colors = {
+        slot: DEFAULT_COLORS[slot] if value == NO_COLOR else value
+        for slot, value in zip(COLOR_SLOTS, theme.colors)
+    }
+    try:
+        client().command("set-colors", {"colors": colors, "all": True}, no_response=True)
+    except (OSError, ValueError):
+        pass
+
+
+class ThemePreview:
+    """Debounced live preview of the selected theme.
+
+    Moving the selection only schedules a preview; the set-colors call goes
+    out once the selection has been still for PREVIEW_DELAY, so scrolling
+    through the list sends one command, not one per row.
+    """
+
+    def __init__(self, original: Optional[ThemeEntry], delay: float = PREVIEW_DELAY) -> None:
+        self.original = original
+        self.delay = delay
+        self.shown = original.name if original else None
+        self.pending: Optional[ThemeEntry] = None
+        self.deadline = 0.0
+        self.accepted = False
+
+    def select(self, theme: ThemeEntry) -> None:
+        if self.pending is not None and theme.name == self.pending.name:
+            return
+        if theme.name == self.shown:
+            self.pending = None
+            return
+        self.pending = theme
+        self.deadline = time.monotonic() + self.delay
+
+    def timeout_ms(self) -> int:
+        """getch() timeout until the pending preview is due (-1 = block)."""
+        if self.pending is None:
+            return -1
+        return max(0, round((self.deadline - time.monotonic()) * 1000))
+
+    def flush(self) -> None:
+        if self.pending is None or time.monotonic() < self.deadline:
+            return
+        push_colors(self.pending)
+        self.shown = self.pending.name
+        self.pending = None
+
+    def revert(self) -> None:
+        self.pending = None
+        if self.shown == (self.original.name if self.original else None):
+            return
+        if self.original is not None:
+            push_colors(self.original)
+        else:
+            rc("set-colors", reset=True)
+        self.shown = self.original.name if self.original else None
+
+
 def picker_ui(stdscr):
     """Main picker UI loop."""
     curses.curs_set(1)
     stdscr.nodelay(False)
-    stdscr.keypad(True)
 
     # Get themes
     all_themes = get_themes()
@@ -94,106 +265,87 @@ def picker_ui(stdscr):
         return None
 
     current_theme = get_current_theme()
-    query = ""
-    selected_idx = 0
+    view = ListView(stdscr, typing=True)
 
     # Find current theme in list
     if current_theme:
-        for idx, (name, _) in enumerate(all_themes):
-            if name == current_theme:
-                selected_idx = idx
+        for idx, theme in enumerate(all_themes):
+            if theme.name == current_theme:
+                view.selected = idx
                 break
 
-    def filtered_themes():
-        """Get themes matching query."""
-        if not query:
-            return all_themes
+    matcher = MetricView(ThemeMatcher(all_themes), PaletteAnalytics(all_themes) if available() else None)
+    preview = ThemePreview(theme_index().get(current_theme) if current_theme else None)
+    try:
+        return _picker_loop(stdscr, view, matcher, preview, current_theme)
+    finally:
+        # Anything but Enter (Esc, an exception) puts the original colors back
+        if not preview.accepted:
+            preview.revert()
 
-        scored = [(match_score(query, name), name, path)
-                  for name, path in all_themes]
-        scored = [(s, n, p) for s, n, p in scored if s > 0]
-        scored.sort(key=lambda x: (-x[0], x[1]))
-        return [(n, p) for _, n, p in scored]
 
+def _picker_loop(stdscr, view: ListView, matcher: MetricView, preview: ThemePreview, current_theme: Optional[str]):
+    analytics = matcher.analytics
+    query = ""
+    sort = "name"
     while True:
-        stdscr.clear()
-        h, w = stdscr.getmaxyx()
-
-        # Header
-        stdscr.addnstr(0, 0, "Theme Picker — type to filter | Enter: apply | Esc/q: cancel",
-                      w-1, curses.A_BOLD)
-
-        # Search query
-        stdscr.addnstr(1, 0, f"Search> {query}", w-1)
-
-        # Current theme indicator
-        if current_theme:
-            stdscr.addnstr(2, 0, f"Current: {current_theme}", w-1, curses.A_DIM)
-
-        # Theme list
-        themes = filtered_themes()
-        if not themes:
-            stdscr.addnstr(4, 0, "No matching themes", w-1)
+        themes = matcher.filter(query, sort)
+        shown_metric = sort if sort != "name" else "contrast"
+
+        def row(idx: int, selected: bool, width: int) -> Line:
+            theme_name = themes[idx].name
+            # Highlight selected, mark current theme
+            attr = curses.A_REVERSE if selected else curses.A_NORMAL
+            prefix = "→ " if theme_name == current_theme else "  "
+            if analytics is None:
+                return text_line(f"{prefix}{theme_name}", attr)
+            value = format_metric(shown_metric, analytics.value(shown_metric, theme_name))
+            return ((0, f"{prefix}{theme_name}", attr), (-11, f"{value:>10}", attr))
+
+        prompt = f"Search> {query}"
+        hints = [f"Current: {current_theme}"] if current_theme else []
+        if analytics is None:
+            hints.append("install numpy for metric sort/filters")
         else:
-            # Adjust selected index if needed
-            selected_idx = min(selected_idx, len(themes) - 1)
-            selected_idx = max(0, selected_idx)
-
-            # Calculate scroll offset
-            visible_lines = h - 5
-            scroll_offset = 0
-            if selected_idx >= visible_lines:
-                scroll_offset = selected_idx - visible_lines + 1
-
-            for idx in range(scroll_offset, min(scroll_offset + visible_lines, len(themes))):
-                theme_name, _ = themes[idx]
-                y_pos = 4 + (idx - scroll_offset)
-
-                if y_pos >= h:
-                    break
-
-                # Highlight selected
-                attr = curses.A_REVERSE if idx == selected_idx else curses.A_NORMAL
-
-                # Mark current theme
-                prefix = "→ " if theme_name == current_theme else "  "
-
-                display_name = f"{prefix}{theme_name}"
-                stdscr.addnstr(y_pos, 0, display_name, w-1, attr)
+            hints.append(f"Sort: {sort} (Tab) | filter: contrast>=7 ansi>3 luminance<0.1")
+        hint = " | ".join(hints)
+        header = (
+            text_line("Theme Picker — type to filter | Enter: apply | Esc: cancel", curses.A_BOLD),
+            text_line(prompt),
+            text_line(hint, curses.A_DIM),
+            BLANK,
+        )
+        view.render(header, len(themes), row, empty=text_line("No matching themes"), cursor=(1, len(prompt)))
 
-        stdscr.refresh()
+        # Preview the selection once it has been still for PREVIEW_DELAY
+        if themes:
+            preview.select(themes[view.selected])
+        stdscr.timeout(preview.timeout_ms())
 
         # Handle input
         ch = stdscr.getch()
+        if ch == -1:
+            preview.flush()
+            continue
+        action = view.handle(ch, len(themes))
 
-        if ch in (ord('q'), 27):  # q or Esc
+        if action == CANCEL:
             return None
-        elif ch in (curses.KEY_ENTER, 10, 13):  # Enter
+        elif action == ACCEPT:
             if themes:
-                selected_theme, _ = themes[selected_idx]
-                return selected_theme
+                preview.accepted = True
+                return themes[view.selected].name
             return None
-        elif ch in (curses.KEY_UP, ord('k')):
-            selected_idx = max(0, selected_idx - 1)
-        elif ch in (curses.KEY_DOWN, ord('j')):
-            if themes:
-                selected_idx = min(len(themes) - 1, selected_idx + 1)
-        elif ch in (curses.KEY_PPAGE,):  # Page Up
-            selected_idx = max(0, selected_idx - 10)
-        elif ch in (curses.KEY_NPAGE,):  # Page Down
-            if themes:
-                selected_idx = min(len(themes) - 1, selected_idx + 10)
-        elif ch in (curses.KEY_HOME,):
-            selected_idx = 0
-        elif ch in (curses.KEY_END,):
-            if themes:
-                selected_idx = len(themes) - 1
-        elif ch in (curses.KEY_BACKSPACE, 127):
-            query = query[:-1]
-            selected_idx = 0
-        elif 32 <= ch <= 126:  # Printable characters
-            query += chr(ch)
-            selected_idx = 0
+        elif action is None:
+            if ch == 9 and analytics is not None:  # Tab: next sort order
+                sort = SORT_ORDERS[(SORT_ORDERS.index(sort) + 1) % len(SORT_ORDERS)]
+                view.selected = 0
+            elif ch in (curses.KEY_BACKSPACE, 127, 8):
+                query = query[:-1]
+                view.selected = 0
+            elif 32 <= ch <= 126:  # Printable characters
+                query += chr(ch)
+                view.selected = 0
 
 
 def main(args: list[str]) -> str:
@@ -215,17 +367,13 @@ def apply_theme(theme_name: str) -> None:
         CURRENT_THEME_FILE.write_text(f"include {theme_name}.conf\n")
 
         # Reload kitty configuration
-        socket_path = f"unix:{HOME}/.cache/kitty/kitty-{os.getenv('USER')}.sock"
-        result = subprocess.run(
-            ["kitty", "@", "--to", socket_path, "load-config"],
-            capture_output=True,
-            text=True
-        )
+        response = rc("load-config")
 
-        if result.returncode == 0:
+        if response and response.get("ok"):
             print(f"\n✓ Applied theme: {theme_name}")
         else:
-            print(f"\n✗ Failed to reload config: {result.stderr}")
+            error = response.get("error") if response else "kitty not reachable"
+            print(f"\n✗ Failed to reload config: {error}")
     except Exception as e:
         print(f"\n✗ Failed to apply theme: {e}")
 
@@ -241,13 +389,8 @@ def handle_result(args: list[str], answer: str, target_window_id: int, boss=None
     try:
         CURRENT_THEME_FILE.write_text(f"include {answer}.conf\n")
 
-        # Reload kitty configuration using kitty @ command with socket
-        socket_path = f"unix:{HOME}/.cache/kitty/kitty-{os.getenv('USER')}.sock"
-        subprocess.run(
-            ["kitty", "@", "--to", socket_path, "load-config"],
-            check=False,
-            capture_output=True
-        )
+        # Reload kitty configuration over the remote control socket
+        rc("load-config")
 
         print(f"✓ Applied theme: {answer}")
     except Exception as e:
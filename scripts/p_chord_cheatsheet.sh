@@ -10,6 +10,7 @@ Press Ctrl+Shift+P, then one of:
   C  Command Palette
   T  Toggle Tmux Prefix (Ctrl+B <-> Ctrl+A)
   S  Save Session Snapshot
+  ⇧S Command duration stats (p50/p95/p99)
   R  Restore Session Snapshot
   W  Watch & auto reload config (toggle)
   H  SSH Host Picker
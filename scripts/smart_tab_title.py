@@ -1,32 +1,75 @@
 #!/usr/bin/env python3
-"""Derive an informative tab title based on the focused window."""
+"""Derive an informative tab title based on the focused window.
+
+Usage:
+  smart_tab_title.py            Retitle the focused tab (or notify the daemon)
+  smart_tab_title.py --all      Retitle every tab whose window changed
+  smart_tab_title.py --daemon   Stay resident and retitle tabs on notifications
+
+The daemon keeps one connection to kitty's remote-control socket and listens
+on a datagram socket for "window changed" notifications, sent by this script
+in its default mode (e.g. from a prompt hook) and by the activity watcher on
+focus changes and when a command finishes. Each kitty instance has its own
+daemon socket, named after KITTY_PID. Titles are recomputed only for windows
+whose cwd or command line changed since the last refresh. ``--all`` does the
+same for every tab from a single ``ls``; run one-shot, it diffs against the
+snapshot it saved last time and sends all changed titles as one pipelined
+batch.
+"""
 from __future__ import annotations
 
 import json
 import os
-import subprocess
+import select
+import signal
+import socket
+import sys
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Dict, Iterable, Optional, Tuple
 
-DEFAULT_SOCKET = f"unix:{Path.home()}/.cache/kitty/kitty-{os.environ.get('USER', '')}.sock"
-SOCKET = os.environ.get("KITTY_LISTEN_ON", DEFAULT_SOCKET)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "kittens"))
+import rc_client  # noqa: E402
+from rc_client import RemoteControl  # noqa: E402
+
+SOCKET = rc_client.socket_address()
+KITTY_PID = os.environ.get("KITTY_PID", "")
+# One daemon per kitty instance: window ids are only unique within one
+DAEMON_SOCKET = Path.home() / ".cache" / "kitty" / (
+    f"smart-tab-title-{KITTY_PID}.sock" if KITTY_PID else "smart-tab-title.sock"
+)
+SNAPSHOT_FILE = Path.home() / ".cache" / "kitty" / "smart-tab-title.json"
+ALL_TABS = "all"
 SHELLS = {"bash", "zsh", "fish", "sh", "nu", "dash"}
 EDITOR_LAUNCHERS = {"nvim", "vim", "nano", "emacs", "hx", "code"}
+MAX_TITLE = 42
 
+# cwd -> (toplevel, gitdir), and HEAD path -> (mtime_ns, branch). Mostly
+# useful to the daemon, which resolves the same directories over and over.
+_ROOT_CACHE: Dict[str, Tuple[str, str]] = {}
+_ROOT_CACHE_SIZE = 512
+_HEAD_CACHE: Dict[str, Tuple[int, str]] = {}
+# directory -> (mtime_ns, icon)
+_PROJECT_CACHE: Dict[str, Tuple[int, Optional[str]]] = {}
 
-def kitty_cmd(*args: str) -> subprocess.CompletedProcess[str]:
-    base = ["kitty", "@", "--to", SOCKET]
-    return subprocess.run(base + list(args), check=False, capture_output=True, text=True)
+# Project marker files in priority order: the first one present wins
+PROJECT_MARKERS: Tuple[Tuple[str, str], ...] = (
+    ("pyproject.toml", "🐍"),
+    ("setup.py", "🐍"),
+    ("requirements.txt", "🐍"),
+    ("Pipfile", "🐍"),
+    ("package.json", "⬢"),
+    ("Cargo.toml", "🦀"),
+    ("go.mod", "🐹"),
+    ("Makefile", "🔨"),
+    ("CMakeLists.txt", "⚙️"),
+    ("docker-compose.yml", "🐳"),
+    ("Dockerfile", "🐳"),
+)
+MARKER_NAMES = frozenset(marker for marker, _ in PROJECT_MARKERS)
 
 
-def load_ls() -> Optional[dict]:
-    result = kitty_cmd("ls")
-    if result.returncode != 0 or not result.stdout.strip():
-        return None
-    try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError:
-        return None
+def load_ls() -> Optional[list]:
+    return rc_client.ls()
 
 
 def first(seq: Iterable, predicate) -> Optional:
@@ -58,32 +101,115 @@ def describe_command(cmdline: list[str], cwd: Path) -> Optional[str]:
 
 
 def detect_project_type(cwd: Path) -> Optional[str]:
-    """Detect project type based on marker files."""
-    markers = {
-        "pyproject.toml": "🐍",
-        "setup.py": "🐍",
-        "requirements.txt": "🐍",
-        "Pipfile": "🐍",
-        "package.json": "⬢",
-        "Cargo.toml": "🦀",
-        "go.mod": "🐹",
-        "Makefile": "🔨",
-        "CMakeLists.txt": "⚙️",
-        "docker-compose.yml": "🐳",
-        "Dockerfile": "🐳",
-    }
-    for marker, icon in markers.items():
-        if (cwd / marker).exists():
-            return icon
-    return None
+    """Detect project type based on marker files.
 
+    One scandir per directory, cached until the directory's mtime changes
+    (which it does whenever an entry is added, removed or renamed).
+    """
+    path = os.fspath(cwd)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _PROJECT_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with os.scandir(path) as entries:
+            present = {entry.name for entry in entries if entry.name in MARKER_NAMES}
+    except OSError:
+        return None
+    icon = next((icon for marker, icon in PROJECT_MARKERS if marker in present), None)
+    if len(_PROJECT_CACHE) >= _ROOT_CACHE_SIZE:
+        _PROJECT_CACHE.clear()
+    _PROJECT_CACHE[path] = (mtime, icon)
+    return icon
 
-def git_context(cwd: Path) -> Optional[str]:
+
+def _read_gitdir_file(dotgit: str) -> Optional[str]:
+    """Resolve a ``gitdir: <path>`` file (worktrees, submodules)."""
+    try:
+        with open(dotgit) as f:
+            line = f.readline().strip()
+    except OSError:
+        return None
+    if not line.startswith("gitdir:"):
+        return None
+    gitdir = line[len("gitdir:"):].strip()
+    return os.path.normpath(os.path.join(os.path.dirname(dotgit), gitdir))
+
+
+def find_git_root(cwd: Path) -> Optional[Tuple[str, str]]:
+    """Walk up from *cwd* to the nearest ``.git``; return (toplevel, gitdir)."""
+    path = os.path.abspath(cwd)
+    cached = _ROOT_CACHE.get(path)
+    if cached is not None:
+        return cached
+    start = path
+    while True:
+        dotgit = os.path.join(path, ".git")
+        if os.path.isdir(dotgit):
+            found: Optional[Tuple[str, str]] = (path, dotgit)
+            break
+        if os.path.isfile(dotgit):
+            gitdir = _read_gitdir_file(dotgit)
+            if gitdir:
+                found = (path, gitdir)
+                break
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    if len(_ROOT_CACHE) >= _ROOT_CACHE_SIZE:
+        _ROOT_CACHE.clear()
+    _ROOT_CACHE[start] = found
+    return found
+
+
+def read_branch(gitdir: str) -> Optional[str]:
+    """Branch name from ``HEAD``, "HEAD" when detached; cached on HEAD's mtime."""
+    head = os.path.join(gitdir, "HEAD")
+    try:
+        mtime = os.stat(head).st_mtime_ns
+    except OSError:
+        return None
+    cached = _HEAD_CACHE.get(head)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
     try:
-        toplevel = subprocess.check_output(["git", "rev-parse", "--show-toplevel"], cwd=cwd, text=True, stderr=subprocess.DEVNULL).strip()
-        branch = subprocess.check_output(["git", "rev-parse", "--abbrev-ref", "HEAD"], cwd=cwd, text=True, stderr=subprocess.DEVNULL).strip()
-    except (subprocess.CalledProcessError, FileNotFoundError):
+        with open(head) as f:
+            content = f.read().strip()
+    except OSError:
         return None
+    if content.startswith("ref:"):
+        ref = content[4:].strip()
+        for prefix in ("refs/heads/", "refs/remotes/", "refs/tags/", "refs/"):
+            if ref.startswith(prefix):
+                ref = ref[len(prefix):]
+                break
+        branch = ref
+    else:
+        branch = "HEAD"
+    _HEAD_CACHE[head] = (mtime, branch)
+    return branch
+
+
+def git_context(cwd: Path) -> Optional[str]:
+    found = find_git_root(cwd)
+    if found is None:
+        return None
+    toplevel, gitdir = found
+    branch = read_branch(gitdir)
+    if branch is None:
+        # Cached walk went stale (repository removed); retry from scratch once
+        _ROOT_CACHE.pop(os.path.abspath(cwd), None)
+        found = find_git_root(cwd)
+        if found is None:
+            return None
+        toplevel, gitdir = found
+        branch = read_branch(gitdir)
+        if branch is None:
+            return None
     repo = Path(toplevel).name
     project_icon = detect_project_type(Path(toplevel))
     prefix = f"{project_icon} " if project_icon else ""
@@ -105,11 +231,27 @@ def fallback_title(cwd: Path) -> str:
     return cwd.name or str(cwd)
 
 
+def window_signature(window: dict) -> Tuple[str, Tuple[str, ...]]:
+    cwd_str = window.get("cwd") or window.get("child", {}).get("cwd") or ""
+    child = window.get("cmdline") or window.get("child", {}).get("cmdline") or []
+    return cwd_str, tuple(child)
+
+
+def compute_title(signature: Tuple[str, Tuple[str, ...]]) -> str:
+    cwd_str, child = signature
+    cwd = Path(cwd_str) if cwd_str else Path.cwd()
+    title = describe_command(list(child), cwd) or fallback_title(cwd)
+    title = title.strip()
+    if len(title) > MAX_TITLE:
+        title = title[:MAX_TITLE - 1] + "…"
+    return title
+
+
 def main() -> None:
     data = load_ls()
     if not data:
         return
-    os_window = first(data.get("os_windows", []), lambda w: w.get("is_focused"))
+    os_window = first(data, lambda w: w.get("is_focused"))
     if not os_window:
         return
     tab = first(os_window.get("tabs", []), lambda t: t.get("is_focused"))
@@ -119,19 +261,193 @@ def main() -> None:
     if not window:
         return
 
-    cwd_str = window.get("cwd") or window.get("child", {}).get("cwd")
-    cwd = Path(cwd_str) if cwd_str else Path.cwd()
-    child = window.get("cmdline") or window.get("child", {}).get("cmdline") or []
-
     current_title = tab.get('title') or ''
-    title = describe_command(child, cwd) or fallback_title(cwd)
-    title = title.strip()
-    if len(title) > 42:
-        title = title[:41] + "…"
+    title = compute_title(window_signature(window))
     # Only set if changed to avoid needless events
     if title != current_title:
-        kitty_cmd("set-tab-title", "--match", f"id:{tab['id']}", title)
+        rc_client.rc("set-tab-title", title=title, match=f"id:{tab['id']}")
+
+
+def notify_daemon(window_id: int | str = 0, path: Path = DAEMON_SOCKET) -> bool:
+    """Ask a running daemon to refresh *window_id* (0 = focused, ALL_TABS = every tab)."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(str(window_id).encode(), str(path))
+        return True
+    except OSError:
+        return False
+
+
+Signature = Tuple[str, Tuple[str, ...]]
+
+
+class TitleUpdater:
+    """Incremental tab retitling over one remote-control connection.
+
+    Remembers, per window, the signature (cwd, cmdline) a title was computed
+    from, so unchanged windows are never recomputed. Used resident by the
+    daemon and one-shot by ``--all`` (with the memory persisted to disk).
+    """
+
+    def __init__(self, rc: RemoteControl) -> None:
+        self.rc = rc
+        # window id -> (signature, title) of the last computation
+        self.cache: Dict[int, Tuple[Signature, str]] = {}
+        self.computed = 0
+        self.skipped = 0
+
+    def ls(self, window_ids: Optional[set[int]] = None) -> list[dict]:
+        if window_ids is None:
+            payload = None
+        elif 0 in window_ids:
+            payload = {"match": "state:focused"}
+        else:
+            payload = {"match": " or ".join(f"id:{wid}" for wid in sorted(window_ids))}
+        response = self.rc.command("ls", payload)
+        if not response or not response.get("ok"):
+            return []
+        data = response.get("data")
+        return json.loads(data) if isinstance(data, str) else (data or [])
+
+    def refresh(self, window_ids: set[int]) -> None:
+        for os_window in self.ls(window_ids):
+            for tab in os_window.get("tabs", []):
+                active = first(tab.get("windows", []), lambda w: w.get("is_active") or w.get("is_focused"))
+                if active is None or not (0 in window_ids or active.get("id") in window_ids):
+                    continue
+                self.retitle(tab, active)
+
+    def title_for(self, window: dict) -> Tuple[Signature, str]:
+        """Signature and title for *window*, recomputed only if the signature changed."""
+        signature = window_signature(window)
+        cached = self.cache.get(window["id"])
+        if cached is not None and cached[0] == signature:
+            self.skipped += 1
+            return cached
+        self.computed += 1
+        return signature, compute_title(signature)
+
+    def retitle(self, tab: dict, window: dict) -> None:
+        entry = self.title_for(window)
+        self.cache[window["id"]] = entry
+        if entry[1] != (tab.get("title") or ""):
+            self.rc.command("set-tab-title", {"title": entry[1], "match": f"id:{tab['id']}"}, no_response=True)
+
+    def refresh_all(self) -> int:
+        """Retitle every tab whose title is out of date; one ls, one batch.
+
+        Cached titles are still compared with the live ones, so a title
+        changed behind our back or lost with a failed batch is put back
+        without recomputing anything.
+        """
+        changes = []
+        pending = []
+        live = set()
+        for os_window in self.ls():
+            for tab in os_window.get("tabs", []):
+                active = first(tab.get("windows", []), lambda w: w.get("is_active") or w.get("is_focused"))
+                if active is None:
+                    continue
+                live.add(active["id"])
+                entry = self.title_for(active)
+                if entry[1] == (tab.get("title") or ""):
+                    self.cache[active["id"]] = entry
+                    continue
+                changes.append(("set-tab-title", {"title": entry[1], "match": f"id:{tab['id']}"}))
+                pending.append((active["id"], entry))
+        # Forget windows that no longer exist so the snapshot stays small
+        for wid in [wid for wid in self.cache if wid not in live]:
+            del self.cache[wid]
+        if changes:
+            # Only titles kitty confirmed are remembered
+            for (wid, entry), response in zip(pending, self.rc.batch(changes)):
+                if response and response.get("ok"):
+                    self.cache[wid] = entry
+                else:
+                    self.cache.pop(wid, None)
+        return len(changes)
+
+    def load(self, path: Path, kitty_pid: str) -> None:
+        """Restore the per-window memory saved by a previous run of this kitty."""
+        try:
+            saved = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return
+        if not isinstance(saved, dict) or saved.get("kitty_pid") != kitty_pid:
+            return
+        for wid, (cwd, cmdline, title) in saved.get("windows", {}).items():
+            self.cache[int(wid)] = ((cwd, tuple(cmdline)), title)
+
+    def save(self, path: Path, kitty_pid: str) -> None:
+        windows = {str(wid): [sig[0], list(sig[1]), title] for wid, (sig, title) in self.cache.items()}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"kitty_pid": kitty_pid, "windows": windows}))
+        os.replace(tmp, path)
+
+    def serve(self, path: Path = DAEMON_SOCKET) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            if notify_daemon(0, path):
+                print(f"smart_tab_title daemon already running on {path}", file=sys.stderr)
+                return
+            path.unlink()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(path))
+        sock.setblocking(False)
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            while True:
+                select.select([sock], [], [])
+                window_ids: set[int] = set()
+                all_tabs = False
+                # Drain everything queued so a burst becomes one refresh
+                while True:
+                    try:
+                        msg = sock.recv(64)
+                    except BlockingIOError:
+                        break
+                    if msg == ALL_TABS.encode():
+                        all_tabs = True
+                        continue
+                    try:
+                        window_ids.add(int(msg))
+                    except ValueError:
+                        continue
+                try:
+                    if all_tabs:
+                        self.refresh_all()
+                    elif window_ids:
+                        self.refresh(window_ids)
+                except (OSError, ValueError):
+                    self.rc.close()
+        finally:
+            sock.close()
+            path.unlink(missing_ok=True)
+
+
+def main_all() -> None:
+    """One-shot retitle of every tab, diffed against the last saved snapshot."""
+    updater = TitleUpdater(rc_client.client(SOCKET))
+    updater.load(SNAPSHOT_FILE, KITTY_PID)
+    try:
+        updater.refresh_all()
+    except (OSError, ValueError):
+        return
+    try:
+        updater.save(SNAPSHOT_FILE, KITTY_PID)
+    except OSError:
+        pass
 
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:] == ["--daemon"]:
+        try:
+            TitleUpdater(rc_client.client(SOCKET)).serve()
+        except KeyboardInterrupt:
+            pass
+    elif sys.argv[1:] == ["--all"]:
+        if not (DAEMON_SOCKET.exists() and notify_daemon(ALL_TABS)):
+            main_all()
+    elif not (DAEMON_SOCKET.exists() and notify_daemon(int(os.environ.get("KITTY_WINDOW_ID", 0) or 0))):
+        main()
@@ -3,22 +3,16 @@
 set -euo pipefail
 
 CONFIG_DIR=${XDG_CONFIG_HOME:-$HOME/.config}/kitty
-WATCHER_FILE="$CONFIG_DIR/watchers/activity.py"
 STATE_FILE="$CONFIG_DIR/.font_scaling_enabled"
 
-# Check if font scaling is currently enabled
+# The activity watcher checks the state file at the start of each resize burst
 if [[ -f "$STATE_FILE" ]]; then
     # Currently enabled - disable it
-    sed -i '131,140s/^    #/    # #/' "$WATCHER_FILE"
-    sed -i '131,140s/^    \([^#]\)/    # \1/' "$WATCHER_FILE"
     rm "$STATE_FILE"
     echo "✓ Dynamic font scaling disabled"
-    echo "  Restart kitty or reload config to apply"
 else
     # Currently disabled - enable it
-    sed -i '131,140s/^    # #/    #/' "$WATCHER_FILE"
-    sed -i '131,140s/^    # \([^#]\)/    \1/' "$WATCHER_FILE"
     touch "$STATE_FILE"
     echo "✓ Dynamic font scaling enabled"
-    echo "  Restart kitty or reload config to apply"
+    echo "  Base size comes from local/font-scale.conf (run auto_scale.sh to regenerate)"
 fi
@@ -0,0 +1,65 @@
+"""Section and note attribution in kittens/help_index.ConfigReader.
+
+Run with ``python3 -m unittest discover tests`` from the config root.
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "kittens"))
+
+from help_index import ConfigReader  # noqa: E402
+
+
+def keymaps_header() -> str:
+    """includes/keymaps.conf up to and including its first ``map`` line."""
+    lines = []
+    for line in (ROOT / "includes" / "keymaps.conf").read_text().splitlines():
+        lines.append(line)
+        if line.startswith("map "):
+            break
+    return "\n".join(lines) + "\n"
+
+
+class ConfigReaderTest(unittest.TestCase):
+
+    def read(self, text: str) -> ConfigReader:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "keymaps.conf"
+            path.write_text(text)
+            reader = ConfigReader(Path(tmp))
+            reader.read(path)
+        return reader
+
+    def test_keymaps_header(self) -> None:
+        reader = self.read(keymaps_header())
+        self.assertEqual(reader.kitty_mod, "ctrl+shift")
+        self.assertEqual([b.keys for b in reader.bindings], ["right press ungrabbed", "f1"])
+        for binding in reader.bindings:
+            self.assertEqual(binding.section, "Window / tab navigation")
+        self.assertTrue(reader.bindings[0].note.startswith("Shell integration helpers"))
+        self.assertEqual(reader.bindings[1].note, "")
+
+    def test_block_before_blank_line_is_not_a_heading(self) -> None:
+        reader = self.read("# File title\n\nmap f1 next_tab\n")
+        self.assertEqual(reader.bindings[0].section, "")
+        self.assertEqual(reader.bindings[0].note, "")
+
+    def test_block_before_setting_is_not_a_heading(self) -> None:
+        reader = self.read("# Modifier\nkitty_mod ctrl+alt\nmap f1 next_tab\n")
+        self.assertEqual(reader.kitty_mod, "ctrl+alt")
+        self.assertEqual(reader.bindings[0].section, "")
+        self.assertEqual(reader.bindings[0].note, "")
+
+    def test_comment_between_bindings_is_a_note(self) -> None:
+        reader = self.read("# Tabs\nmap f1 next_tab\n# Go back\nmap f2 previous_tab\nmap f3 close_tab\n")
+        self.assertEqual([b.section for b in reader.bindings], ["Tabs"] * 3)
+        self.assertEqual([b.note for b in reader.bindings], ["", "Go back", ""])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,42 +3,690 @@
 Provides:
 - Automatic tab title updates based on running commands
 - Window dimming for unfocused windows
-- Auto-save sessions on last window close
+- Session auto-save (sessions/last.session), kept current as tabs change
+- Per-command duration histograms (see kittens/command_stats.py)
 """
 from __future__ import annotations
 
-import shlex
+import os
+import socket
+import sys
+import threading
 import time
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-from kitty.boss import Boss
-from kitty.window import Window
+if TYPE_CHECKING:
+    from kitty.boss import Boss
+    from kitty.window import Window
+
+try:
+    from kitty.fast_data_types import add_timer
+except ImportError:  # pragma: no cover - older kitty or running outside kitty
+    add_timer = None
+try:
+    from kitty.fast_data_types import get_os_window_size
+except ImportError:  # pragma: no cover - older kitty or running outside kitty
+    get_os_window_size = None
+
+# Shared helpers live next to the kittens
+_KITTENS_DIR = str(Path(__file__).resolve().parent.parent / "kittens")
+if _KITTENS_DIR not in sys.path:
+    sys.path.append(_KITTENS_DIR)
+
+from duration_histogram import SNAPSHOT_FILE, CommandStats  # noqa: E402
+
+_CONFIG_DIR = Path.home() / ".config" / "kitty"
+_STATS_DUMP_FLAG = _CONFIG_DIR / ".cmd_stats_dump_enabled"
+_SESSION_FILE = _CONFIG_DIR / "sessions" / "last.session"
+# Batch session rewrites while tabs are busy changing
+_SESSION_DEBOUNCE = 2.0
+_FONT_SCALING_FLAG = _CONFIG_DIR / ".font_scaling_enabled"
+_FONT_SCALE_CONF = _CONFIG_DIR / "local" / "font-scale.conf"
+# Quiet period after the last resize event before the font size is applied
+_RESIZE_DEBOUNCE = 0.15
+_DIMMING_FLAG = _CONFIG_DIR / ".dimming_enabled"
+_CURRENT_THEME_FILE = _CONFIG_DIR / "themes" / "current-theme.conf"
+_FALLBACK_THEME_FILE = _CONFIG_DIR / "themes" / "default-dark.conf"
+# How far unfocused foreground/palette colors are pulled toward the background
+_DIM_AMOUNT = 0.4
+# Datagram socket of `scripts/smart_tab_title.py --daemon`, when running; one
+# per kitty instance, named after the pid its children see as KITTY_PID
+_TITLE_DAEMON_SOCKET = str(Path.home() / ".cache" / "kitty" / f"smart-tab-title-{os.getpid()}.sock")
 
-# State tracking
-_STATE: Dict[int, Dict[str, Any]] = {}
 _LAST_FOCUSED_WINDOW: int | None = None
+_CMD_STATS = CommandStats()
 
 
-def _short_command(cmdline: str) -> str:
-    """Extract short command name from command line."""
+class WindowState:
+    """Per-window command bookkeeping."""
+
+    __slots__ = ("started_at", "original_title", "command")
+
+    def __init__(self) -> None:
+        self.started_at: Optional[float] = None
+        self.original_title: Optional[str] = None
+        self.command = ""
+
+
+class WindowStateStore:
+    """Capacity-bounded map of window id -> WindowState.
+
+    Entries normally go away on command stop or window close. When the store
+    is full, entries for windows kitty no longer knows about are swept first;
+    if every entry is still live the least recently used one is dropped.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.capacity = capacity
+        self._entries: "OrderedDict[int, WindowState]" = OrderedDict()
+        self.evicted_stale = 0
+        self.evicted_lru = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def evictions(self) -> int:
+        return self.evicted_stale + self.evicted_lru
+
+    def get(self, wid: int) -> Optional[WindowState]:
+        return self._entries.get(wid)
+
+    def get_or_create(self, boss: Boss, wid: int) -> WindowState:
+        entry = self._entries.get(wid)
+        if entry is not None:
+            self._entries.move_to_end(wid)
+            return entry
+        if len(self._entries) >= self.capacity:
+            self.sweep(boss)
+            while len(self._entries) >= self.capacity:
+                self._entries.popitem(last=False)
+                self.evicted_lru += 1
+        entry = self._entries[wid] = WindowState()
+        return entry
+
+    def discard(self, wid: int) -> None:
+        self._entries.pop(wid, None)
+
+    def sweep(self, boss: Boss) -> int:
+        """Drop entries whose window no longer exists in *boss*."""
+        live = boss.window_id_map
+        stale = [wid for wid in self._entries if wid not in live]
+        for wid in stale:
+            del self._entries[wid]
+        self.evicted_stale += len(stale)
+        return len(stale)
+
+
+_STATE = WindowStateStore()
+
+
+class TitleScheduler:
+    """Coalesce tab title writes and apply them directly on the tab object.
+
+    Titles requested for a tab during one event-loop tick replace each other;
+    only the last one is written when the tick ends, and only if it differs
+    from the title the tab already carries.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[int, str] = {}
+        self._boss: Optional[Boss] = None
+        self._timer_armed = False
+        self.requested = 0
+        self.written = 0
+
+    def current(self, tab: Any) -> Optional[str]:
+        """Title the tab will carry once pending writes are flushed."""
+        pending = self._pending.get(tab.id)
+        if pending is not None:
+            return pending
+        return getattr(tab, "name", None) or getattr(tab, "title", None)
+
+    def schedule(self, boss: Boss, tab: Any, title: str) -> None:
+        self.requested += 1
+        if title == self.current(tab):
+            return
+        if title == getattr(tab, "name", None):
+            # Reverting to what is already on screen - cancel the pending write
+            self._pending.pop(tab.id, None)
+            return
+        self._pending[tab.id] = title
+        self._boss = boss
+        if self._timer_armed:
+            return
+        if add_timer is None:
+            self.flush()
+            return
+        self._timer_armed = True
+        add_timer(self._on_timer, 0, False)
+
+    def _on_timer(self, timer_id: Optional[int] = None) -> None:
+        self._timer_armed = False
+        self.flush()
+
+    def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        boss = self._boss
+        if boss is None:
+            return
+        for tab_id, title in pending.items():
+            tab = boss.tab_for_id(tab_id)
+            if tab is None or getattr(tab, "name", None) == title:
+                continue
+            try:
+                tab.set_title(title)
+                self.written += 1
+            except Exception:
+                pass
+
+
+_TITLES = TitleScheduler()
+
+
+def _tab_for_window(boss: Boss, window: Window) -> Any:
+    """Resolve the tab that owns *window* without going through RC matching."""
+    tabref = getattr(window, "tabref", None)
+    tab = tabref() if tabref is not None else None
+    if tab is None:
+        tab = boss.tab_for_id(getattr(window, "tab_id", None))
+    return tab
+
+
+def _window_cwd(window: Any) -> Optional[str]:
+    for attr in ("cwd_of_child", "cwd"):
+        cwd = getattr(window, attr, None)
+        if cwd:
+            return cwd
+    return None
+
+
+class SessionRecorder:
+    """Keep sessions/last.session current from in-memory boss state.
+
+    Tab records (title, cwd) are refreshed on the main thread as events
+    arrive; only changed records mark the snapshot dirty. Rendering is
+    debounced, and a background thread writes the text and atomically
+    replaces the session file. Closing the last window renders and writes
+    on the spot instead (write_now), since the writer thread may not get
+    to run before kitty exits.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._tabs: Dict[int, Tuple[str, Optional[str]]] = {}
+        self._dirty = False
+        self._timer_armed = False
+        self._boss: Optional[Boss] = None
+        self._cond = threading.Condition()
+        # Held while taking the latest text and writing it, so writes land in order
+        self._write_lock = threading.Lock()
+        self._pending: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self.writes = 0
+
+    @staticmethod
+    def _record(tab: Any) -> Tuple[str, Optional[str]]:
+        title = _TITLES.current(tab) or ""
+        window = getattr(tab, "active_window", None)
+        return title, _window_cwd(window) if window is not None else None
+
+    def update_tab(self, boss: Boss, tab: Any) -> None:
+        record = self._record(tab)
+        if self._tabs.get(tab.id) != record:
+            self._tabs[tab.id] = record
+            self._mark_dirty(boss)
+
+    def drop_tab(self, boss: Boss, tab_id: int) -> None:
+        if self._tabs.pop(tab_id, None) is not None:
+            self._mark_dirty(boss)
+
+    def _mark_dirty(self, boss: Boss) -> None:
+        self._dirty = True
+        self._boss = boss
+        if self._timer_armed or add_timer is None:
+            return
+        self._timer_armed = True
+        add_timer(self._on_timer, _SESSION_DEBOUNCE, False)
+
+    def _on_timer(self, timer_id: Optional[int] = None) -> None:
+        self._timer_armed = False
+        if self._boss is not None:
+            self.publish(self._boss)
+
+    def render(self, boss: Boss) -> str:
+        lines = ["# Snapshot generated by watchers/activity.py"]
+        for tm in list(boss.os_window_map.values()):
+            for i, tab in enumerate(tm.tabs):
+                record = self._tabs.get(tab.id)
+                if record is None:
+                    record = self._tabs[tab.id] = self._record(tab)
+                title, cwd = record
+                title = (title or f"Tab {i + 1}").replace("\n", " ")[:80]
+                lines.append(f"new_tab {title}")
+                if cwd:
+                    lines.append(f"cd {cwd}")
+                lines.append("launch bash")
+                lines.append("")
+        lines.append("goto_tab 1")
+        return "\n".join(lines) + "\n"
+
+    def publish(self, boss: Boss, force: bool = False) -> None:
+        """Render the snapshot (main thread) and hand it to the writer."""
+        if not (self._dirty or force):
+            return
+        self._dirty = False
+        text = self.render(boss)
+        with self._cond:
+            self._pending = text
+            self._cond.notify()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="kitty-session-writer", daemon=True)
+            self._thread.start()
+
+    def write_now(self, boss: Boss) -> None:
+        """Render and write the snapshot on the calling thread.
+
+        Supersedes any text still queued for the writer; at most it waits
+        for a write already in progress, never for the debounce or a queue.
+        """
+        self._dirty = False
+        text = self.render(boss)
+        with self._write_lock:
+            with self._cond:
+                self._pending = None
+            try:
+                self._write(text)
+            except OSError:
+                pass
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+            with self._write_lock:
+                with self._cond:
+                    text, self._pending = self._pending, None
+                if text is not None:
+                    try:
+                        self._write(text)
+                    except OSError:
+                        pass
+
+    def _write(self, text: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp")
+        with open(tmp, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.writes += 1
+
+
+_SESSION = SessionRecorder(_SESSION_FILE)
+
+
+def _configured_font_size(path: Path, default: float = 13.0) -> float:
+    """Read ``font_size`` from a generated conf file (local/font-scale.conf)."""
     try:
-        parts = shlex.split(cmdline)
+        for line in path.read_text().splitlines():
+            parts = line.split()
+            if len(parts) >= 2 and parts[0] == "font_size":
+                return float(parts[1])
+    except (OSError, ValueError):
+        pass
+    return default
+
+
+class FontScaler:
+    """Debounced, table-driven font scaling based on OS window width.
+
+    kitty's font size belongs to the OS window, so resize events are
+    grouped per OS window. A trailing-edge timer applies the font size once
+    the OS window has been quiet for _RESIZE_DEBOUNCE seconds, and the size
+    is only sent when the quantized value differs from the last one applied
+    to that OS window.
+    """
+
+    REFERENCE_WIDTH = 1600.0
+    BUCKET_PX = 32
+    MAX_WIDTH = 8192
+    MIN_SIZE = 9.0
+    MAX_SIZE = 18.0
+    STEP = 0.5
+
+    def __init__(self, conf_path: Path) -> None:
+        self.conf_path = conf_path
+        self._table: Optional[List[float]] = None
+        self._table_mtime: Optional[float] = None
+        self._windows: Dict[int, int] = {}
+        self._deadlines: Dict[int, float] = {}
+        self._applied: Dict[int, float] = {}
+        self._boss: Optional[Boss] = None
+        self.events = 0
+        self.coalesced = 0
+        self.applied = 0
+        self.unchanged = 0
+
+    def table(self) -> List[float]:
+        """Width bucket -> font size, rebuilt when the conf file changes."""
+        try:
+            mtime: Optional[float] = self.conf_path.stat().st_mtime
+        except OSError:
+            mtime = None
+        if self._table is None or mtime != self._table_mtime:
+            base = _configured_font_size(self.conf_path)
+            table = []
+            for bucket in range(self.MAX_WIDTH // self.BUCKET_PX + 1):
+                width = bucket * self.BUCKET_PX + self.BUCKET_PX / 2
+                size = base * width / self.REFERENCE_WIDTH
+                size = round(size / self.STEP) * self.STEP
+                table.append(max(self.MIN_SIZE, min(self.MAX_SIZE, size)))
+            self._table = table
+            self._table_mtime = mtime
+            # A new base size invalidates what was applied with the old one
+            self._applied.clear()
+        return self._table
+
+    def size_for(self, width: int) -> float:
+        table = self.table()
+        return table[min(width // self.BUCKET_PX, len(table) - 1)]
+
+    def os_window_width(self, boss: Boss, window: Window) -> int:
+        """Pixel width of the OS window holding *window*."""
+        if get_os_window_size is not None:
+            try:
+                size = get_os_window_size(window.os_window_id)
+                if size:
+                    return int(size["framebuffer_width"])
+            except Exception:
+                pass
+        # Older kitty: the span of the windows in its tab
+        tab = _tab_for_window(boss, window)
+        windows = list(getattr(tab, "windows", ())) or [window]
+        geometries = [w.geometry for w in windows if getattr(w, "geometry", None) is not None]
+        if not geometries:
+            return 0
+        return max(g.right for g in geometries) - min(g.left for g in geometries)
+
+    def on_resize(self, boss: Boss, window: Window) -> None:
+        self.events += 1
+        os_window_id = window.os_window_id
+        self._boss = boss
+        # Any window of the OS window will do to measure and address it
+        self._windows[os_window_id] = window.id
+        if os_window_id in self._deadlines:
+            self.coalesced += 1
+            self._deadlines[os_window_id] = time.monotonic() + _RESIZE_DEBOUNCE
+            return
+        # Start of a burst - the only point the toggle file is checked
+        if add_timer is None or not _FONT_SCALING_FLAG.exists():
+            return
+        self._deadlines[os_window_id] = time.monotonic() + _RESIZE_DEBOUNCE
+        add_timer(lambda timer_id, os_window_id=os_window_id: self._fire(os_window_id), _RESIZE_DEBOUNCE, False)
+
+    def _fire(self, os_window_id: int) -> None:
+        remaining = self._deadlines.get(os_window_id, 0) - time.monotonic()
+        if remaining > 0.001:
+            add_timer(lambda timer_id, os_window_id=os_window_id: self._fire(os_window_id), remaining, False)
+            return
+        self._deadlines.pop(os_window_id, None)
+        wid = self._windows.pop(os_window_id, None)
+        boss = self._boss
+        window = boss.window_id_map.get(wid) if boss is not None and wid is not None else None
+        if window is None:
+            return
+        width = self.os_window_width(boss, window)
+        if width <= 0:
+            return
+        size = self.size_for(width)
+        if self._applied.get(os_window_id) == size:
+            self.unchanged += 1
+            return
+        self._applied[os_window_id] = size
+        self.applied += 1
+        try:
+            self._set_font_size(boss, window, os_window_id, size)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _set_font_size(boss: Boss, window: Window, os_window_id: int, size: float) -> None:
+        change = getattr(boss, "_change_font_size", None)
+        if change is not None:
+            change({os_window_id: size})
+            return
+        # set-font-size only reaches the active OS window; never resize another one
+        active = boss.active_window
+        if active is not None and active.os_window_id == os_window_id:
+            boss.call_remote_control(window, ("set-font-size", f"{size:.1f}"))
+
+
+_FONT_SCALER = FontScaler(_FONT_SCALE_CONF)
+
+
+def _hex_to_rgb(value: str) -> Optional[Tuple[int, int, int]]:
+    value = value.lstrip("#")
+    if len(value) != 6:
+        return None
+    try:
+        return int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
     except ValueError:
-        parts = cmdline.split()
-    if not parts:
-        return ""
-    return Path(parts[0]).name[:32]
+        return None
+
+
+def _theme_colors(path: Path) -> Dict[str, Tuple[int, int, int]]:
+    """Parse foreground/background/colorN from a theme conf file."""
+    colors: Dict[str, Tuple[int, int, int]] = {}
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return colors
+    for line in lines:
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        key = parts[0]
+        if key in ("foreground", "background") or (key.startswith("color") and key[5:].isdigit()):
+            rgb = _hex_to_rgb(parts[1])
+            if rgb is not None:
+                colors[key] = rgb
+    return colors
+
+
+class DimmedPalette:
+    """Dimmed variant of the active theme, rebuilt only when a theme file changes.
+
+    themes/current-theme.conf names the active theme via ``include``; both
+    files are stat'ed per lookup and the palette is re-parsed and blended
+    only when either mtime moves.
+    """
+
+    def __init__(self, current_file: Path, fallback_file: Path, amount: float) -> None:
+        self.current_file = current_file
+        self.fallback_file = fallback_file
+        self.amount = amount
+        self._current_mtime: Optional[float] = None
+        self._theme_file: Optional[Path] = None
+        self._built_from: Optional[Tuple[Path, float]] = None
+        self._specs: Tuple[str, ...] = ()
+        self._normal: Tuple[str, ...] = ()
+        self.rebuilds = 0
+
+    def _resolve_theme_file(self) -> Path:
+        try:
+            mtime = self.current_file.stat().st_mtime
+        except OSError:
+            self._current_mtime = None
+            return self.fallback_file
+        if mtime != self._current_mtime or self._theme_file is None:
+            self._current_mtime = mtime
+            self._theme_file = self.fallback_file
+            try:
+                for line in self.current_file.read_text().splitlines():
+                    parts = line.split()
+                    if len(parts) == 2 and parts[0] == "include":
+                        self._theme_file = self.current_file.parent / parts[1]
+                        break
+            except OSError:
+                pass
+        return self._theme_file
+
+    def _refresh(self) -> bool:
+        theme_file = self._resolve_theme_file()
+        try:
+            key = (theme_file, theme_file.stat().st_mtime)
+        except OSError:
+            return False
+        if key != self._built_from:
+            self._built_from = key
+            colors = _theme_colors(theme_file)
+            self._specs = self._build(colors)
+            self._normal = tuple(f"{name}=#{r:02x}{g:02x}{b:02x}" for name, (r, g, b) in colors.items())
+            self.rebuilds += 1
+        return True
+
+    def specs(self) -> Tuple[str, ...]:
+        """``name=#rrggbb`` arguments for set-colors, from cache when possible."""
+        return self._specs if self._refresh() else ()
+
+    def normal_specs(self) -> Tuple[str, ...]:
+        """The active theme's own colors, to undo ``specs()`` on one window."""
+        return self._normal if self._refresh() else ()
+
+    def _build(self, colors: Dict[str, Tuple[int, int, int]]) -> Tuple[str, ...]:
+        bg = colors.get("background")
+        if bg is None:
+            return ()
+        a = self.amount
+        specs = []
+        for key, (r, g, b) in colors.items():
+            if key == "background":
+                continue
+            r = round(r + (bg[0] - r) * a)
+            g = round(g + (bg[1] - g) * a)
+            b = round(b + (bg[2] - b) * a)
+            specs.append(f"{key}=#{r:02x}{g:02x}{b:02x}")
+        return tuple(specs)
+
+
+_DIMMED_PALETTE = DimmedPalette(_CURRENT_THEME_FILE, _FALLBACK_THEME_FILE, _DIM_AMOUNT)
+_DIMMED_WINDOWS: set[int] = set()
+
+_TITLE_DAEMON: Optional[socket.socket] = None
+
+
+def _notify_title_daemon(wid: int) -> None:
+    """Tell the smart_tab_title daemon that *wid* changed (no-op if not running)."""
+    global _TITLE_DAEMON
+    if not os.path.exists(_TITLE_DAEMON_SOCKET):
+        return
+    try:
+        if _TITLE_DAEMON is None:
+            _TITLE_DAEMON = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            _TITLE_DAEMON.setblocking(False)
+        _TITLE_DAEMON.sendto(str(wid).encode(), _TITLE_DAEMON_SOCKET)
+    except OSError:
+        pass
+
+
+# Same whitespace set as shlex in POSIX mode
+_SHELL_WHITESPACE = " \t\r\n"
+# Longer command lines are rarely repeated verbatim; don't let them pin memory
+_CACHEABLE_CMDLINE = 512
+
+
+def _leading_word(cmdline: str) -> Optional[str]:
+    """Return the first shell word of *cmdline* with quoting resolved.
+
+    Only the leading word is scanned, following shlex POSIX rules. Returns
+    None for unbalanced quotes or a dangling escape, where shlex would raise.
+    """
+    n = len(cmdline)
+    i = 0
+    while i < n and cmdline[i] in _SHELL_WHITESPACE:
+        i += 1
+    if i == n:
+        return None
+    out = []
+    start = i
+    while i < n:
+        ch = cmdline[i]
+        if ch in _SHELL_WHITESPACE:
+            break
+        if ch == "'":
+            out.append(cmdline[start:i])
+            end = cmdline.find("'", i + 1)
+            if end < 0:
+                return None
+            out.append(cmdline[i + 1:end])
+            i = start = end + 1
+        elif ch == '"':
+            out.append(cmdline[start:i])
+            i += 1
+            while True:
+                if i >= n:
+                    return None
+                ch = cmdline[i]
+                if ch == '"':
+                    break
+                if ch == "\\" and i + 1 < n and cmdline[i + 1] in '"\\':
+                    i += 1
+                    ch = cmdline[i]
+                out.append(ch)
+                i += 1
+            i = start = i + 1
+        elif ch == "\\":
+            out.append(cmdline[start:i])
+            if i + 1 >= n:
+                return None
+            out.append(cmdline[i + 1])
+            i = start = i + 2
+        else:
+            i += 1
+    out.append(cmdline[start:i])
+    return "".join(out)
+
+
+def _command_name(cmdline: str) -> str:
+    word = _leading_word(cmdline)
+    if word is None:
+        parts = cmdline.split(None, 1)
+        if not parts:
+            return ""
+        word = parts[0]
+    # Mirror Path(word).name, which ignores trailing slashes and "." parts
+    word = word.rstrip("/")
+    while word.endswith("/."):
+        word = word[:-2].rstrip("/")
+    name = word.rpartition("/")[2]
+    return "" if name == "." else name[:32]
+
+
+_cached_command_name = lru_cache(maxsize=256)(_command_name)
+
+
+def _short_command(cmdline: str) -> str:
+    """Extract short command name from command line."""
+    if len(cmdline) <= _CACHEABLE_CMDLINE:
+        return _cached_command_name(cmdline)
+    return _command_name(cmdline)
 
 
 def _default_title(window: Window) -> str:
     """Generate default title from window context."""
-    cwd = getattr(window, "cwd", None)
+    cwd = _window_cwd(window)
     if cwd:
         leaf = Path(cwd).name
         if leaf:
             return leaf
-    tab = getattr(window, "tab", None)
+    tabref = getattr(window, "tabref", None)
+    tab = tabref() if tabref is not None else None
     if tab is not None:
         title = getattr(tab, "title", None)
         if title:
@@ -52,38 +700,33 @@ def on_cmd_startstop(boss: Boss, window: Window, data: Dict[str, Any]) -> None:
         return
 
     wid = window.id
-    entry = _STATE.setdefault(wid, {})
     is_start = bool(data.get("is_start"))
+    tab = _tab_for_window(boss, window)
 
     if is_start:
-        entry["started_at"] = time.monotonic()
-        tab = getattr(window, "tab", None)
-        if tab is not None:
-            entry["original_title"] = getattr(tab, "title", None)
+        entry = _STATE.get_or_create(boss, wid)
+        entry.started_at = time.monotonic()
+        # Keep the first title if a previous stop event was missed
+        if tab is not None and entry.original_title is None:
+            entry.original_title = _TITLES.current(tab)
         short = _short_command(data.get("cmdline", ""))
-        if short:
-            try:
-                boss.call_remote_control(window, (
-                    "set-tab-title",
-                    "--match",
-                    "recent:0",
-                    short,
-                ))
-            except Exception:
-                pass
+        entry.command = short
+        if short and tab is not None:
+            _TITLES.schedule(boss, tab, short)
     else:
-        # Command finished - restore original title
-        original = entry.get("original_title")
-        try:
-            boss.call_remote_control(window, (
-                "set-tab-title",
-                "--match",
-                "recent:0",
-                original or _default_title(window),
-            ))
-        except Exception:
-            pass
-        _STATE.pop(wid, None)
+        # Command finished - record its duration and restore original title
+        entry = _STATE.get(wid)
+        original = None
+        if entry is not None:
+            original = entry.original_title
+            if entry.command and entry.started_at is not None:
+                _CMD_STATS.record(wid, entry.command, time.monotonic() - entry.started_at)
+        if tab is not None:
+            _TITLES.schedule(boss, tab, original or _default_title(window))
+            # The command may have changed directory
+            _SESSION.update_tab(boss, tab)
+        _notify_title_daemon(wid)
+        _STATE.discard(wid)
 
 
 def on_focus_change(boss: Boss, window: Window, data: Dict[str, Any]) -> None:
@@ -94,23 +737,34 @@ def on_focus_change(boss: Boss, window: Window, data: Dict[str, Any]) -> None:
         return
 
     focused = data.get("focused", False)
+    wid = window.id
 
     if focused:
         # Window gained focus - restore full opacity
-        _LAST_FOCUSED_WINDOW = window.id
-        # Note: Changing colors dynamically can be jarring, so we keep it subtle
-        # Users can uncomment these to enable dimming:
-        # try:
-        #     boss.call_remote_control(window, ("set-colors", "--reset"))
-        # except Exception:
-        #     pass
-    else:
-        # Window lost focus - could dim here
-        # try:
-        #     boss.call_remote_control(window, ("set-colors", "foreground=#a0a0a0"))
-        # except Exception:
-        #     pass
-        pass
+        _LAST_FOCUSED_WINDOW = wid
+        _notify_title_daemon(wid)
+        tab = _tab_for_window(boss, window)
+        if tab is not None:
+            _SESSION.update_tab(boss, tab)
+        if wid in _DIMMED_WINDOWS:
+            _DIMMED_WINDOWS.discard(wid)
+            # Explicit colors for this window only: --reset would imply --all
+            # and go back to the startup colors, undoing any theme change
+            specs = _DIMMED_PALETTE.normal_specs()
+            if specs:
+                try:
+                    boss.call_remote_control(window, ("set-colors", "--match", f"id:{wid}", *specs))
+                except Exception:
+                    pass
+    elif _DIMMING_FLAG.exists():
+        # Window lost focus - apply the prebuilt dimmed palette in one call
+        specs = _DIMMED_PALETTE.specs()
+        if specs:
+            try:
+                boss.call_remote_control(window, ("set-colors", "--match", f"id:{wid}", *specs))
+                _DIMMED_WINDOWS.add(wid)
+            except Exception:
+                pass
 
 
 def on_resize(boss: Boss, window: Window, data: Dict[str, Any]) -> None:
@@ -126,19 +780,10 @@ def on_resize(boss: Boss, window: Window, data: Dict[str, Any]) -> None:
         # Window just created
         return
 
-    # Dynamic font scaling based on window width
-    # Uncomment below to enable automatic scaling
-    # try:
-    #     if new_geom and hasattr(new_geom, 'xpixel'):
-    #         width = new_geom.xpixel
-    #         if width > 0:
-    #             # Scale font: 13pt for ~1600px, 15pt for ~2000px, 11pt for ~1200px
-    #             base_size = 13.0
-    #             scale_factor = width / 1600.0
-    #             new_size = max(9.0, min(18.0, base_size * scale_factor))
-    #             boss.call_remote_control(window, ("set-font-size", f"{new_size:.1f}"))
-    # except Exception:
-    #     pass
+    # Dynamic font scaling based on the OS window's width
+    # (enabled by scripts/toggle_font_scaling.sh)
+    if new_geom is not None:
+        _FONT_SCALER.on_resize(boss, window)
 
 
 def on_close(boss: Boss, window: Window, data: Dict[str, Any]) -> None:
@@ -146,24 +791,31 @@ def on_close(boss: Boss, window: Window, data: Dict[str, Any]) -> None:
     if window is None:
         return
 
-    # Clean up state
-    _STATE.pop(window.id, None)
+    # Clean up state, including entries whose close event was missed
+    _STATE.discard(window.id)
+    _STATE.sweep(boss)
+    _CMD_STATS.forget_window(window.id)
+    _DIMMED_WINDOWS.discard(window.id)
 
     # Check if this is the last window
     try:
         window_count = len(boss.window_id_map)
         if window_count <= 1:
-            # This is the last window - auto-save session
-            # Note: This runs in background, won't block closing
-            try:
-                import subprocess
-                session_script = Path.home() / ".config" / "kitty" / "scripts" / "session_snapshot.sh"
-                if session_script.exists():
-                    subprocess.Popen([str(session_script)],
-                                   stdout=subprocess.DEVNULL,
-                                   stderr=subprocess.DEVNULL)
-            except Exception:
-                pass
+            if _STATS_DUMP_FLAG.exists():
+                try:
+                    _CMD_STATS.dump(SNAPSHOT_FILE)
+                except OSError:
+                    pass
+            # This is the last window - write the session inline rather than
+            # waiting on the writer thread while kitty's UI thread is blocked
+            _SESSION.write_now(boss)
+        else:
+            tab = _tab_for_window(boss, window)
+            if tab is not None:
+                if any(w.id != window.id for w in tab.windows):
+                    _SESSION.update_tab(boss, tab)
+                else:
+                    _SESSION.drop_tab(boss, tab.id)
     except Exception:
         pass
 